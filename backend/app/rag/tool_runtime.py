@@ -1,15 +1,23 @@
 from __future__ import annotations
 
 import asyncio
+import functools
 import hashlib
 import inspect
 import json
 import logging
+import random
+import re
+import sys
 import time
-from collections import defaultdict, deque
-from dataclasses import dataclass
+import weakref
+from collections import OrderedDict, deque
+from collections.abc import Set as AbstractSet
+from dataclasses import dataclass, field
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, Mapping, NamedTuple, Optional
 
 from pydantic import BaseModel, ValidationError
 
@@ -126,54 +134,247 @@ logger = logging.getLogger(__name__)
 
 BROWSER_LOCAL_REPO_PREFIX = "browser-local://"
 
-_TOOL_CLASS_MAP: dict[str, str] = {
-    "list_tools": "system.discovery",
-    "search_tools": "system.discovery",
-    "get_tool_details": "system.discovery",
-    "list_tool_classes": "system.discovery",
-    "list_tools_by_class": "system.discovery",
-    "get_tool_class_details": "system.discovery",
-    "get_project_metadata": "system.context",
-    "read_chat_messages": "system.context",
-    "request_user_input": "system.context",
-    "workspace_get_context": "system.context",
-    "repo_tree": "repository.read",
-    "repo_grep": "repository.read",
-    "open_file": "repository.read",
-    "symbol_search": "repository.read",
-    "keyword_search": "repository.read",
-    "git_list_branches": "git.branches",
-    "git_checkout_branch": "git.branches",
-    "git_create_branch": "git.branches",
-    "git_fetch": "git.sync",
-    "git_pull": "git.sync",
-    "git_push": "git.sync",
-    "git_status": "git.changes",
-    "git_diff": "git.changes",
-    "git_log": "git.changes",
-    "git_show_file_at_ref": "git.changes",
-    "compare_branches": "git.changes",
-    "git_stage_files": "git.commit",
-    "git_unstage_files": "git.commit",
-    "git_commit": "git.commit",
-    "read_docs_folder": "documentation.read",
-    "write_documentation_file": "documentation.write",
-    "generate_project_docs": "documentation.write",
-    "run_tests": "quality.testing",
-    "create_jira_issue": "issues.jira",
-    "create_chat_task": "tasks.chat",
-    "list_chat_tasks": "tasks.chat",
-    "update_chat_task": "tasks.chat",
-    "create_automation": "automation",
-    "list_automations": "automation",
-    "update_automation": "automation",
-    "delete_automation": "automation",
-    "run_automation": "automation",
-    "list_automation_templates": "automation",
-    "chroma_count": "knowledge.vector",
-    "chroma_search_chunks": "knowledge.vector",
-    "chroma_open_chunks": "knowledge.vector",
-}
+# json.dumps() builds a new JSONEncoder per call whenever options are passed; these are built once.
+# Output is identical to json.dumps(obj, ensure_ascii=False, default=str[, sort_keys=True]).
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+_JSON_SORTED_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True, default=str)
+
+_BOOL_STR: dict[bool, str] = {True: "true", False: "false"}
+_REQUIRED_STR: dict[bool, str] = {True: "REQUIRED", False: "OPTIONAL"}
+
+_TTL_CACHE_MAX_ENTRIES = 256
+_RESULT_CACHE_MAX_ENTRIES = 1024
+_RESULT_CACHE_PRUNE_EVERY = 64
+# Result TTLs are spread by +/-15% so entries stored together do not all expire (and re-run) together.
+_RESULT_CACHE_TTL_JITTER = 0.15
+# Cache tags shared by builtin readers (ToolSpec.cache_tags) and the writers that invalidate them.
+_CACHE_TAG_REPO_STATE = "repo_state"
+_CACHE_TAG_CHAT_TASKS = "chat_tasks"
+_CACHE_TAG_AUTOMATIONS = "automations"
+# Substrings that mark an execution error as worth retrying; matched case-insensitively in one regex scan.
+_TRANSIENT_ERROR_MARKERS = (
+    "timeout",
+    "timed out",
+    "temporarily unavailable",
+    "connection reset",
+    "connection refused",
+    "connection aborted",
+    "too many requests",
+    "rate limit",
+    "429",
+    "502",
+    "503",
+    "504",
+)
+_TRANSIENT_ERROR_RE = re.compile("|".join(re.escape(m) for m in _TRANSIENT_ERROR_MARKERS), re.IGNORECASE)
+# Always worth retrying, whatever the message says; checked before the message scan.
+# Timeouts never get here: execute() handles asyncio.TimeoutError in its own branch.
+_TRANSIENT_EXC_TYPES: tuple[type[BaseException], ...] = (ConnectionError,)
+
+# Upper clamp for per-tool rate limits; a window never holds more timestamps than the limit.
+_RATE_LIMIT_MAX_PER_MIN = 6000
+_RATE_WINDOW_MIN_LEN = 64
+# Retry backoff by attempt number (0.2s steps, capped at 1s); sleeps only happen before a retry that will run.
+_RETRY_BACKOFF_SEC = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+# Normalized once at import; lookups in _default_class_for_spec are plain dict hits.
+_TOOL_CLASS_MAP: Mapping[str, str] = MappingProxyType(
+    {
+        name: normalize_class_key(class_key) or class_key
+        for name, class_key in {
+            "list_tools": "system.discovery",
+            "search_tools": "system.discovery",
+            "get_tool_details": "system.discovery",
+            "list_tool_classes": "system.discovery",
+            "list_tools_by_class": "system.discovery",
+            "get_tool_class_details": "system.discovery",
+            "get_project_metadata": "system.context",
+            "read_chat_messages": "system.context",
+            "request_user_input": "system.context",
+            "workspace_get_context": "system.context",
+            "repo_tree": "repository.read",
+            "repo_grep": "repository.read",
+            "open_file": "repository.read",
+            "symbol_search": "repository.read",
+            "keyword_search": "repository.read",
+            "git_list_branches": "git.branches",
+            "git_checkout_branch": "git.branches",
+            "git_create_branch": "git.branches",
+            "git_fetch": "git.sync",
+            "git_pull": "git.sync",
+            "git_push": "git.sync",
+            "git_status": "git.changes",
+            "git_diff": "git.changes",
+            "git_log": "git.changes",
+            "git_show_file_at_ref": "git.changes",
+            "compare_branches": "git.changes",
+            "git_stage_files": "git.commit",
+            "git_unstage_files": "git.commit",
+            "git_commit": "git.commit",
+            "read_docs_folder": "documentation.read",
+            "write_documentation_file": "documentation.write",
+            "generate_project_docs": "documentation.write",
+            "run_tests": "quality.testing",
+            "create_jira_issue": "issues.jira",
+            "create_chat_task": "tasks.chat",
+            "list_chat_tasks": "tasks.chat",
+            "update_chat_task": "tasks.chat",
+            "create_automation": "automation",
+            "list_automations": "automation",
+            "update_automation": "automation",
+            "delete_automation": "automation",
+            "run_automation": "automation",
+            "list_automation_templates": "automation",
+            "chroma_count": "knowledge.vector",
+            "chroma_search_chunks": "knowledge.vector",
+            "chroma_open_chunks": "knowledge.vector",
+        }.items()
+    }
+)
+
+
+# Tools that never depend on project capabilities (no capability lookup needed).
+_CAPABILITY_EXEMPT_TOOLS = frozenset(
+    {
+        "list_tools",
+        "search_tools",
+        "get_tool_details",
+        "list_tool_classes",
+        "list_tools_by_class",
+        "get_tool_class_details",
+        "get_project_metadata",
+    }
+)
+
+
+# Connector type -> required config fields. Each field lists the accepted keys in lookup order;
+# bitbucket additionally needs a token or username + app password (checked in _connector_is_configured).
+_CONNECTOR_REQUIRED_FIELDS: Mapping[str, tuple[tuple[str, ...], ...]] = MappingProxyType(
+    {
+        "github": (("owner",), ("repo",), ("token",)),
+        "git": (("owner",), ("repo",), ("token",)),
+        "bitbucket": (("workspace",), ("repo_slug", "repo")),
+        "azure_devops": (("organization", "org"), ("project",), ("repository", "repo"), ("pat", "token")),
+        "jira": (("baseUrl",), ("email",), ("apiToken",)),
+    }
+)
+
+
+def _cfg_text(cfg: Mapping[str, Any], keys: tuple[str, ...]) -> str:
+    # Same as `str(cfg.get(a) or cfg.get(b) or "").strip()`: the first truthy value wins.
+    for key in keys:
+        value = cfg.get(key)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def _all_nonempty(cfg: Mapping[str, Any], fields: tuple[tuple[str, ...], ...]) -> bool:
+    for keys in fields:
+        if not _cfg_text(cfg, keys):
+            return False
+    return True
+
+
+# Tools that policies can never block (discovery and user clarification).
+_POLICY_EXEMPT_TOOLS = frozenset(
+    {
+        "list_tools",
+        "search_tools",
+        "get_tool_details",
+        "list_tool_classes",
+        "list_tools_by_class",
+        "get_tool_class_details",
+        "request_user_input",
+    }
+)
+
+
+def _cap_has_project(caps: Mapping[str, Any]) -> bool:
+    return bool(caps.get("project_found"))
+
+
+def _cap_has_repo_read(caps: Mapping[str, Any]) -> bool:
+    # Also gates branch listing and documentation reads.
+    return bool(
+        caps.get("local_repo_exists")
+        or caps.get("remote_git_configured")
+        or (caps.get("browser_local_repo") and caps.get("has_user"))
+        or (caps.get("local_connector_configured") and caps.get("has_user"))
+    )
+
+
+def _cap_has_local_repo(caps: Mapping[str, Any]) -> bool:
+    return bool(caps.get("local_repo_exists") and not caps.get("browser_local_repo"))
+
+
+def _cap_has_docs_generate(caps: Mapping[str, Any]) -> bool:
+    return bool(
+        _cap_has_local_repo(caps)
+        or (caps.get("browser_local_repo") and caps.get("has_user"))
+        or (caps.get("local_connector_configured") and caps.get("has_user"))
+    )
+
+
+def _cap_has_git_fetch(caps: Mapping[str, Any]) -> bool:
+    return bool(caps.get("local_repo_exists") or (caps.get("browser_local_repo") and caps.get("has_user")))
+
+
+def _cap_has_jira(caps: Mapping[str, Any]) -> bool:
+    return bool(caps.get("jira_configured"))
+
+
+def _cap_has_chat(caps: Mapping[str, Any]) -> bool:
+    return bool(caps.get("has_chat"))
+
+
+def _capability_rules() -> dict[str, tuple[Callable[[Mapping[str, Any]], bool], str]]:
+    groups: list[tuple[tuple[str, ...], Callable[[Mapping[str, Any]], bool], str]] = [
+        (
+            ("repo_tree", "repo_grep", "open_file", "symbol_search", "git_show_file_at_ref"),
+            _cap_has_repo_read,
+            "repo_source_unavailable",
+        ),
+        (
+            (
+                "create_automation",
+                "list_automations",
+                "update_automation",
+                "delete_automation",
+                "run_automation",
+                "list_automation_templates",
+            ),
+            _cap_has_project,
+            "project_not_found",
+        ),
+        (("read_docs_folder",), _cap_has_repo_read, "documentation_source_unavailable"),
+        (("git_list_branches", "git_checkout_branch", "git_create_branch"), _cap_has_repo_read, "git_source_unavailable"),
+        (("git_fetch",), _cap_has_git_fetch, "git_source_unavailable"),
+        (
+            (
+                "git_pull",
+                "git_push",
+                "git_status",
+                "git_diff",
+                "git_log",
+                "git_stage_files",
+                "git_unstage_files",
+                "git_commit",
+                "compare_branches",
+                "run_tests",
+            ),
+            _cap_has_local_repo,
+            "local_repository_unavailable",
+        ),
+        (("write_documentation_file", "generate_project_docs"), _cap_has_docs_generate, "local_repository_unavailable"),
+        (("create_jira_issue",), _cap_has_jira, "jira_connector_not_configured"),
+        (("request_user_input", "read_chat_messages", "workspace_get_context"), _cap_has_chat, "chat_context_missing"),
+    ]
+    return {sys.intern(name): (check, reason) for names, check, reason in groups for name in names}
+
+
+# Tool name -> (capability predicate, reason reported when it fails).
+_CAPABILITY_RULES: Mapping[str, tuple[Callable[[Mapping[str, Any]], bool], str]] = MappingProxyType(_capability_rules())
 
 
 @dataclass
@@ -183,9 +384,11 @@ class ToolContext:
     user_id: str
     chat_id: str | None = None
     policy: dict[str, Any] | None = None
+    # (source policy, frozen copy); rebuilt only when `policy` is reassigned.
+    policy_memo: tuple[Any, Mapping[str, Any]] | None = field(default=None, init=False, repr=False, compare=False)
 
 
-@dataclass
+@dataclass(slots=True)
 class ToolSpec:
     name: str
     description: str
@@ -201,20 +404,418 @@ class ToolSpec:
     runtime: str = "backend"
     version: str = ""
     allow_extra_args: bool = False
+    # Only for tools whose args never come from the model: skips Pydantic validation (model_construct).
+    trusted_args: bool = False
     class_key: str = "util"
     class_display: str | None = None
+    # Cached results of this tool are dropped once any tool listing one of these tags in
+    # `invalidates_tags` completes successfully.
+    cache_tags: tuple[str, ...] = ()
+    invalidates_tags: tuple[str, ...] = ()
+    # Derived in ToolRuntime.register(); the request model never changes after registration.
+    fields_meta: list[dict[str, Any]] = field(default_factory=list, init=False, repr=False, compare=False)
+    schema_block: str = field(default="", init=False, repr=False, compare=False)
+    search_haystack: str = field(default="", init=False, repr=False, compare=False)
+    resolved_class_key: str = field(default="", init=False, repr=False, compare=False)
+    resolved_class_path: str = field(default="", init=False, repr=False, compare=False)
+    field_names: frozenset[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    # The subset of `field_names` that _merge_context_defaults pins from the ToolContext.
+    context_fields: frozenset[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    allowed_arg_names: frozenset[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    handler_param_count: int = field(default=1, init=False, repr=False, compare=False)
+    # Builds the request payload from merged args; fixed by `model` and `trusted_args`.
+    payload_builder: Callable[[dict[str, Any]], Any] | None = field(default=None, init=False, repr=False, compare=False)
+    # Set on the first successful call: (result type, unbound dumper or None for plain values).
+    result_dumper: tuple[type, Callable[[Any], Any] | None] | None = field(default=None, init=False, repr=False, compare=False)
+
+
+# Request models are immutable classes shared by every runtime built in this process. Keys are weak:
+# custom tools build a fresh args model per project runtime, and those must not be pinned here.
+_MODEL_FIELD_NAMES: weakref.WeakKeyDictionary[type, frozenset[str]] = weakref.WeakKeyDictionary()
+_MODEL_ARG_NAMES: weakref.WeakKeyDictionary[type, frozenset[str]] = weakref.WeakKeyDictionary()
+_MODEL_FIELDS_META: weakref.WeakKeyDictionary[type, list[dict[str, Any]]] = weakref.WeakKeyDictionary()
+# Handler code object -> positional parameter count. Closures rebuilt per runtime share one code object.
+_HANDLER_PARAM_COUNTS: dict[Any, int] = {}
+_HANDLER_PARAM_COUNTS_MAX_ENTRIES = 256
+# Request fields that are always filled from the active ToolContext.
+_CONTEXT_ARG_NAMES = frozenset({"project_id", "projectId", "branch", "chat_id", "user_id", "user"})
+
+
+def _resolve_payload_builder(model_cls: type[BaseModel], trusted: bool) -> Callable[[dict[str, Any]], Any]:
+    if trusted and hasattr(model_cls, "model_construct"):
+        construct = model_cls.model_construct
+        return lambda merged: construct(**merged)
+    if hasattr(model_cls, "model_validate"):
+        return model_cls.model_validate
+    return model_cls.parse_obj
+
+
+def _resolve_result_dumper(result_type: type) -> Callable[[Any], Any] | None:
+    dumper: Callable[[Any], Any] | None = None
+    if hasattr(result_type, "model_dump"):
+        dumper = result_type.model_dump
+    elif hasattr(result_type, "dict"):
+        dumper = result_type.dict
+    return dumper
+
+
+def _model_field_names(model_cls: type[BaseModel]) -> frozenset[str]:
+    names = _MODEL_FIELD_NAMES.get(model_cls)
+    if names is None:
+        if hasattr(model_cls, "model_fields"):
+            names = frozenset(getattr(model_cls, "model_fields").keys())
+        elif hasattr(model_cls, "__fields__"):
+            names = frozenset(getattr(model_cls, "__fields__").keys())
+        else:
+            names = frozenset()
+        _MODEL_FIELD_NAMES[model_cls] = names
+    return names
+
+
+def _model_arg_names(model_cls: type[BaseModel]) -> frozenset[str]:
+    names = _MODEL_ARG_NAMES.get(model_cls)
+    if names is None:
+        allowed: set[str] = set()
+        fields = getattr(model_cls, "model_fields", None)
+        if fields is None:
+            fields = getattr(model_cls, "__fields__", {})
+        for fname, f in fields.items():
+            allowed.add(fname)
+            alias = getattr(f, "alias", None)
+            if alias:
+                allowed.add(str(alias))
+        names = frozenset(allowed)
+        _MODEL_ARG_NAMES[model_cls] = names
+    return names
+
+
+# A tool policy with its allow/block lists parsed once; cached per frozen policy mapping.
+@dataclass(frozen=True, slots=True)
+class PolicyView:
+    allowed: frozenset[str]
+    blocked: frozenset[str]
+    allowed_classes: frozenset[str]
+    blocked_classes: frozenset[str]
+    approved: frozenset[str]
+    strict_allowlist: bool
+    read_only_only: bool
+    require_approval_for_write_tools: bool
+    dry_run: bool
+    raw: Mapping[str, Any] = field(repr=False, compare=False)
+
+
+# Class key -> fallback display name; class keys come from a small, mostly static set.
+_DEFAULT_CLASS_DISPLAYS: dict[str, str] = {}
+
+
+def _default_class_display_for(class_key: str) -> str:
+    display = _DEFAULT_CLASS_DISPLAYS.get(class_key)
+    if display is None:
+        leaf = str(class_key or "").strip().split(".")[-1]
+        display = leaf.replace("_", " ").title() if leaf else "Class"
+        if len(_DEFAULT_CLASS_DISPLAYS) >= _TTL_CACHE_MAX_ENTRIES:
+            _DEFAULT_CLASS_DISPLAYS.clear()
+        _DEFAULT_CLASS_DISPLAYS[class_key] = display
+    return display
+
+
+def _handler_param_count(handler: Callable[..., Any]) -> int:
+    # Only plain functions are keyed by code: a bound method shares its function's code but drops `self`.
+    code = handler.__code__ if inspect.isfunction(handler) else None
+    if code is not None:
+        count = _HANDLER_PARAM_COUNTS.get(code)
+        if count is not None:
+            return count
+    try:
+        count = len(inspect.signature(handler).parameters)
+    except Exception:
+        count = 1
+    if code is not None:
+        if len(_HANDLER_PARAM_COUNTS) >= _HANDLER_PARAM_COUNTS_MAX_ENTRIES:
+            _HANDLER_PARAM_COUNTS.clear()
+        _HANDLER_PARAM_COUNTS[code] = count
+    return count
+
+
+def _model_fields_meta(model: type[BaseModel]) -> list[dict[str, Any]]:
+    # Shared by every spec using the model; treated as read-only like the catalog rows that embed it.
+    meta = _MODEL_FIELDS_META.get(model)
+    if meta is None:
+        meta = _introspect_fields(model)
+        _MODEL_FIELDS_META[model] = meta
+    return meta
+
+
+def _introspect_fields(model: type[BaseModel]) -> list[dict[str, Any]]:
+    fields = getattr(model, "model_fields", None)
+    if fields is None:
+        fields = getattr(model, "__fields__", {})
+
+    out: list[dict[str, Any]] = []
+    for fname, f in fields.items():
+        ann = getattr(f, "annotation", None) or getattr(f, "outer_type_", Any)
+        type_name = getattr(ann, "__name__", str(ann))
+        required = False
+        if hasattr(f, "is_required"):
+            required = bool(f.is_required())
+        elif hasattr(f, "required"):
+            required = bool(getattr(f, "required"))
+        out.append(
+            {
+                "name": fname,
+                "type": type_name,
+                "required": required,
+            }
+        )
+    return out
+
+
+class _CatalogEntry(NamedTuple):
+    name: str
+    spec: ToolSpec
+    row: dict[str, Any]
+    # `row` without "parameters", for listings that do not include them.
+    brief_row: dict[str, Any]
+
+
+class _DiscoveryRow(NamedTuple):
+    entry: _CatalogEntry
+    class_key: str
+    class_display: str
+    class_display_lc: str
+    class_origin: str
+
+
+class _DiscoveryIndex(NamedTuple):
+    rows: tuple[_DiscoveryRow, ...]
+    by_name: dict[str, _DiscoveryRow]
+    # Rows per effective class key, each slice in catalog (name) order.
+    by_class: dict[str, tuple[_DiscoveryRow, ...]]
+
+
+class _CatalogCandidate(NamedTuple):
+    entry: _CatalogEntry
+    class_key: str
+    class_display: str
+    class_origin: str
+    allowed: bool
+    reason: str
 
 
 class ToolRuntime:
     def __init__(self):
-        self._tools: Dict[str, ToolSpec] = {}
-        self._windows: Dict[str, Deque[float]] = defaultdict(deque)
-        self._cache: Dict[str, tuple[float, ToolEnvelope]] = {}
-        self._capability_cache: Dict[str, tuple[float, dict[str, Any]]] = {}
-        self._tool_class_cache: tuple[float, list[dict[str, Any]]] | None = None
+        self._tool_table: Dict[str, ToolSpec] = {}
+        # Read-only view: all mutations go through register() so cached catalogs stay valid.
+        self._tools: Mapping[str, ToolSpec] = MappingProxyType(self._tool_table)
+        # Per-tool rate windows; each deque's maxlen tracks the largest limit applied to that tool.
+        self._windows: Dict[str, Deque[float]] = {}
+        # Retry timestamps per effective class key, shared by every tool of the class (one-minute window).
+        self._retry_windows: Dict[str, Deque[float]] = {}
+        # (catalog version, {class key: retries allowed per minute}).
+        self._retry_budget_cache: tuple[int, dict[str, int]] | None = None
+        # LRU order: oldest first. Bounded by _RESULT_CACHE_MAX_ENTRIES.
+        # key -> (expires_at, envelope, versions of the spec's cache tags when the call started).
+        self._cache: OrderedDict[str, tuple[float, ToolEnvelope, tuple[int, ...]]] = OrderedDict()
+        self._cache_tag_versions: Dict[str, int] = {}
+        self._cache_puts = 0
+        self._capability_cache: Dict[str, tuple[float, Mapping[str, Any]]] = {}
+        self._capability_inflight: Dict[str, asyncio.Future[Mapping[str, Any]]] = {}
+        # id(capability snapshot) -> (snapshot, {tool name: decision}); the snapshot ref keeps the id unique.
+        self._capability_decision_cache: Dict[int, tuple[Mapping[str, Any], dict[str, tuple[bool, str]]]] = {}
+        self._tool_class_cache: tuple[float, tuple[dict[str, Any], ...]] | None = None
+        self._tool_class_map_cache: tuple[Any, dict[str, dict[str, Any]]] | None = None
+        # (catalog version, class rows, discovery rows, rows by tool name); class rows are held for the identity check.
+        self._discovery_index_cache: tuple[int, Any, _DiscoveryIndex] | None = None
+        self._catalog_version = 0
+        self._catalog_cache: list[_CatalogEntry] | None = None
+        self._catalog_index: dict[str, _CatalogEntry] = {}
+        self._tools_by_lower: dict[str, ToolSpec] | None = None
+        self._policy_catalog_cache: Dict[str, tuple[float, list[dict[str, Any]]]] = {}
+        self._schema_text_cache: str | None = None
+        self._context_schema_text_cache: Dict[str, tuple[float, str]] = {}
+        # id(frozen policy) -> (policy, parsed view, {tool name: decision}).
+        self._policy_decision_cache: Dict[int, tuple[Mapping[str, Any], PolicyView, dict[str, tuple[bool, str]]]] = {}
 
     def register(self, spec: ToolSpec) -> None:
-        self._tools[spec.name] = spec
+        self.register_many((spec,))
+
+    def register_many(self, specs: Iterable[ToolSpec]) -> None:
+        # Derived caches are dropped once for the whole batch rather than once per spec.
+        for spec in specs:
+            spec.name = sys.intern(spec.name)
+            self._prepare_spec(spec)
+            self._tool_table[spec.name] = spec
+        self._invalidate_catalog()
+
+    def _prepare_spec(self, spec: ToolSpec) -> None:
+        spec.resolved_class_key = sys.intern(self._effective_spec_class_key(spec.name, spec))
+        spec.resolved_class_path = class_key_to_path(spec.resolved_class_key)
+        spec.field_names = self._field_names(spec.model)
+        spec.context_fields = spec.field_names & _CONTEXT_ARG_NAMES
+        spec.allowed_arg_names = self._allowed_arg_names(spec.model)
+        spec.handler_param_count = _handler_param_count(spec.handler)
+        spec.payload_builder = _resolve_payload_builder(spec.model, spec.trusted_args)
+        spec.fields_meta = _model_fields_meta(spec.model)
+        spec.schema_block = self._render_schema_block(spec)
+        spec.search_haystack = self._render_search_haystack(spec)
+
+    def _render_search_haystack(self, spec: ToolSpec) -> str:
+        # The class display name comes from the tool class store and is matched separately per call.
+        class_key = spec.resolved_class_key
+        parts: list[str] = [
+            spec.name,
+            spec.description,
+            spec.origin,
+            spec.runtime,
+            spec.version,
+            class_key,
+            spec.resolved_class_path,
+        ]
+        for p in spec.fields_meta:
+            parts.append(str(p["name"]))
+            parts.append(str(p["type"]))
+        return " ".join(parts).lower()
+
+    def _render_schema_block(self, spec: ToolSpec) -> str:
+        class_key = spec.resolved_class_key
+        lines: list[str] = [
+            spec.name,
+            f"  Description: {spec.description}",
+            f"  Class: {class_key} ({spec.resolved_class_path})",
+            f"  Timeout: {spec.timeout_sec}s",
+            f"  Rate limit: {spec.rate_limit_per_min}/min",
+            f"  Retries: {spec.max_retries}",
+            f"  Read only: {_BOOL_STR[bool(spec.read_only)]}",
+        ]
+        if spec.require_approval:
+            lines.append("  Requires approval: true")
+        if spec.origin != "builtin":
+            lines.append(f"  Origin: {spec.origin}")
+        if spec.runtime:
+            lines.append(f"  Runtime: {spec.runtime}")
+        if spec.version:
+            lines.append(f"  Version: {spec.version}")
+        if spec.cache_ttl_sec > 0:
+            lines.append(f"  Cache TTL: {spec.cache_ttl_sec}s")
+        lines.append("  Parameters:")
+        if not spec.fields_meta:
+            lines.append("  - none")
+        for p in spec.fields_meta:
+            req = _REQUIRED_STR[bool(p["required"])]
+            lines.append(f"  - {p['name']}: {p['type']} ({req})")
+        return "\n".join(lines)
+
+    def _invalidate_catalog(self) -> None:
+        # Must be called whenever `_tools` or a registered spec is mutated.
+        self._catalog_version += 1
+        self._catalog_cache = None
+        self._catalog_index = {}
+        self._discovery_index_cache = None
+        self._tools_by_lower = None
+        self._policy_catalog_cache.clear()
+        self._schema_text_cache = None
+        self._context_schema_text_cache.clear()
+        self._policy_decision_cache.clear()
+        self._capability_decision_cache.clear()
+
+    def _tool_by_lower_name(self, name: str) -> ToolSpec | None:
+        index = self._tools_by_lower
+        if index is None:
+            index = {}
+            for tool_name in self.tool_names():
+                index.setdefault(tool_name.lower(), self._tools[tool_name])
+            self._tools_by_lower = index
+        return index.get(name)
+
+    def _catalog_entries(self) -> list[_CatalogEntry]:
+        entries = self._catalog_cache
+        if entries is None:
+            entries = self._build_catalog_entries()
+        return entries
+
+    def _catalog_entry(self, name: str) -> _CatalogEntry | None:
+        if self._catalog_cache is None:
+            self._build_catalog_entries()
+        return self._catalog_index.get(name)
+
+    def _policy_catalog_key(self, ctx: ToolContext, policy: Mapping[str, Any], *filters: Any) -> str:
+        raw = _JSON_SORTED_ENCODER.encode([self._catalog_version, self._capability_cache_key(ctx), dict(policy), *filters])
+        # Policies can carry long tool/class lists; keep a fixed-size digest as the dict key.
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _cache_tag_stamp(self, spec: ToolSpec) -> tuple[int, ...]:
+        if not spec.cache_tags:
+            return ()
+        versions = self._cache_tag_versions
+        return tuple(versions.get(tag, 0) for tag in spec.cache_tags)
+
+    def _bump_cache_tags(self, tags: tuple[str, ...]) -> None:
+        versions = self._cache_tag_versions
+        for tag in tags:
+            versions[tag] = versions.get(tag, 0) + 1
+
+    def _retry_budget(self, class_key: str) -> int:
+        cached = self._retry_budget_cache
+        if cached is None or cached[0] != self._catalog_version:
+            budgets: dict[str, int] = {}
+            for spec in self._tools.values():
+                # Tools that never retry must not widen the budget of the tools that do.
+                if spec.max_retries <= 0:
+                    continue
+                share = max(1, spec.rate_limit_per_min) * spec.max_retries
+                budgets[spec.resolved_class_key] = budgets.get(spec.resolved_class_key, 0) + share
+            cached = (self._catalog_version, budgets)
+            self._retry_budget_cache = cached
+        return cached[1].get(class_key, 0)
+
+    def _acquire_retry(self, name: str, spec: ToolSpec, retries: int) -> bool:
+        # Retries of all tools in a class draw on one budget, so a failing shared backend is not hammered.
+        class_key = spec.resolved_class_key
+        now = time.monotonic()
+        window = self._retry_windows.get(class_key)
+        if window is None:
+            window = deque()
+            self._retry_windows[class_key] = window
+        while window and now - window[0] > 60:
+            window.popleft()
+        # A policy retry override still gets the tool's own per-minute share.
+        budget = max(self._retry_budget(class_key), max(1, spec.rate_limit_per_min) * retries)
+        if len(window) >= budget:
+            logger.warning("tool.retry_budget_exhausted tool=%s class=%s", name, class_key)
+            return False
+        window.append(now)
+        return True
+
+    def _result_cache_put(self, key: str, expires_at: float, envelope: ToolEnvelope, tag_stamp: tuple[int, ...]) -> None:
+        cache = self._cache
+        cache[key] = (expires_at, envelope, tag_stamp)
+        cache.move_to_end(key)
+        self._cache_puts += 1
+        if self._cache_puts % _RESULT_CACHE_PRUNE_EVERY == 0:
+            now = time.monotonic()
+            for stale in [k for k, (exp, _env, _stamp) in cache.items() if exp <= now]:
+                del cache[stale]
+        while len(cache) > _RESULT_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
+    def _ttl_cache_get(self, cache: Dict[str, tuple[float, Any]], key: str) -> Any:
+        cached = cache.get(key)
+        if not cached:
+            return None
+        if time.monotonic() >= cached[0]:
+            cache.pop(key, None)
+            return None
+        return cached[1]
+
+    def _ttl_cache_put(self, cache: Dict[str, tuple[float, Any]], key: str, value: Any, ttl_sec: float) -> None:
+        now = time.monotonic()
+        if len(cache) >= _TTL_CACHE_MAX_ENTRIES:
+            expired = [k for k, (expires_at, _value) in cache.items() if now >= expires_at]
+            for k in expired:
+                cache.pop(k, None)
+            if len(cache) >= _TTL_CACHE_MAX_ENTRIES:
+                cache.clear()
+        cache[key] = (now + ttl_sec, value)
 
     def tool_names(self) -> list[str]:
         return sorted(self._tools.keys())
@@ -222,18 +823,18 @@ class ToolRuntime:
     def has_tool(self, name: str) -> bool:
         return name in self._tools
 
-    def _policy_dict(self, ctx: ToolContext) -> dict[str, Any]:
-        p = ctx.policy or {}
-        if isinstance(p, dict):
-            return p
-        return {}
+    def _policy_dict(self, ctx: ToolContext) -> Mapping[str, Any]:
+        source = ctx.policy
+        memo = ctx.policy_memo
+        if memo is not None and memo[0] is source:
+            return memo[1]
+        p = source or {}
+        frozen: Mapping[str, Any] = MappingProxyType(dict(p) if isinstance(p, dict) else {})
+        ctx.policy_memo = (source, frozen)
+        return frozen
 
-    def _field_names(self, model_cls: type[BaseModel]) -> set[str]:
-        if hasattr(model_cls, "model_fields"):
-            return set(getattr(model_cls, "model_fields").keys())
-        if hasattr(model_cls, "__fields__"):
-            return set(getattr(model_cls, "__fields__").keys())
-        return set()
+    def _field_names(self, model_cls: type[BaseModel]) -> frozenset[str]:
+        return _model_field_names(model_cls)
 
     def _as_tool_name_set(self, raw: Any) -> set[str]:
         out: set[str] = set()
@@ -256,7 +857,7 @@ class ToolRuntime:
         return out
 
     def _default_class_for_spec(self, name: str, spec: ToolSpec) -> str:
-        mapped = normalize_class_key(_TOOL_CLASS_MAP.get(name))
+        mapped = _TOOL_CLASS_MAP.get(name)
         if mapped:
             return mapped
         return "util" if bool(spec.read_only) else "system"
@@ -270,43 +871,92 @@ class ToolRuntime:
         return self._default_class_for_spec(name, spec)
 
     def _default_class_display(self, class_key: str) -> str:
-        leaf = str(class_key or "").strip().split(".")[-1]
-        if not leaf:
-            return "Class"
-        return leaf.replace("_", " ").title()
+        return _default_class_display_for(class_key)
 
-    async def _load_tool_classes_cached(self) -> list[dict[str, Any]]:
-        now = time.time()
+    async def _load_tool_classes_cached(self) -> tuple[dict[str, Any], ...]:
+        # Returned rows are shared with the cache and must be treated as read-only.
+        now = time.monotonic()
         cached = self._tool_class_cache
         if cached and now < cached[0]:
-            return list(cached[1])
+            return cached[1]
         rows = await list_tool_classes(
             include_builtin=True,
             include_custom=True,
             include_disabled=False,
             include_virtual_uncategorized=True,
         )
-        self._tool_class_cache = (now + 15.0, list(rows))
-        return list(rows)
+        snapshot = tuple(rows)
+        self._tool_class_cache = (now + 15.0, snapshot)
+        return snapshot
+
+    def _tool_class_map(self, rows: Any) -> dict[str, dict[str, Any]]:
+        # Built once per class snapshot; the held `rows` reference keeps the identity check sound.
+        cached = self._tool_class_map_cache
+        if cached is not None and cached[0] is rows:
+            return cached[1]
+        by_key = tool_class_map(rows)
+        self._tool_class_map_cache = (rows, by_key)
+        return by_key
+
+    def _discovery_index(self, class_rows: Any) -> _DiscoveryIndex:
+        # Class resolution per tool only changes with the tool set or the class snapshot.
+        cached = self._discovery_index_cache
+        if cached is not None and cached[0] == self._catalog_version and cached[1] is class_rows:
+            return cached[2]
+        by_key = self._tool_class_map(class_rows)
+        rows: list[_DiscoveryRow] = []
+        for entry in self._catalog_entries():
+            spec = entry.spec
+            class_key = spec.resolved_class_key
+            class_row = by_key.get(class_key) or {}
+            class_display = (
+                str(class_row.get("display_name") or "")
+                or spec.class_display
+                or self._default_class_display(class_key)
+            )
+            class_origin = str(class_row.get("origin") or ("custom" if spec.origin == "custom" else "builtin"))
+            rows.append(_DiscoveryRow(entry, class_key, class_display, class_display.lower(), class_origin))
+        by_class: dict[str, list[_DiscoveryRow]] = {}
+        for row in rows:
+            by_class.setdefault(row.class_key, []).append(row)
+        index = _DiscoveryIndex(
+            rows=tuple(rows),
+            by_name={row.entry.name: row for row in rows},
+            by_class={key: tuple(class_slice) for key, class_slice in by_class.items()},
+        )
+        self._discovery_index_cache = (self._catalog_version, class_rows, index)
+        return index
+
+    async def tools_in_class(self, class_key: str, *, include_subclasses: bool = False) -> list[ToolSpec]:
+        class_filter = normalize_class_key(class_key)
+        if not class_filter:
+            return []
+        class_rows = await self._load_tool_classes_cached()
+        keys = class_descendants(class_rows, class_filter) if include_subclasses else {class_filter}
+        return [row.entry.spec for row in _rows_for_classes(self._discovery_index(class_rows), keys)]
+
+    def _spec_class_key(self, name: str, spec: ToolSpec) -> str:
+        return spec.resolved_class_key or self._effective_spec_class_key(name, spec)
 
     async def _tool_class_info(self, name: str, spec: ToolSpec) -> dict[str, Any]:
-        class_key = self._effective_spec_class_key(name, spec)
+        class_key = self._spec_class_key(name, spec)
+        class_path = spec.resolved_class_path or class_key_to_path(class_key)
         rows = await self._load_tool_classes_cached()
-        by_key = tool_class_map(rows)
+        by_key = self._tool_class_map(rows)
         row = by_key.get(class_key)
         if row:
             chain = class_path_chain(rows, class_key)
             return {
                 "class_key": class_key,
                 "class_display": str(row.get("display_name") or class_key),
-                "class_path": class_key_to_path(class_key),
+                "class_path": class_path,
                 "class_chain": chain,
                 "class_origin": str(row.get("origin") or "custom"),
             }
         return {
             "class_key": class_key,
             "class_display": spec.class_display or class_key,
-            "class_path": class_key_to_path(class_key),
+            "class_path": class_path,
             "class_chain": [class_key],
             "class_origin": "custom" if spec.origin == "custom" else "builtin",
         }
@@ -322,7 +972,7 @@ class ToolRuntime:
 
     def _tool_override_int(
         self,
-        policy: dict[str, Any],
+        policy: Mapping[str, Any],
         *,
         name: str,
         key: str,
@@ -335,13 +985,12 @@ class ToolRuntime:
             return self._coerce_int(raw.get(name), fallback, min_value, max_value)
         return fallback
 
-    def _class_key_matches(self, tool_class_key: str, class_filters: set[str]) -> bool:
+    def _class_key_matches(self, tool_class_key: str, class_filters: AbstractSet[str]) -> bool:
         if not tool_class_key or not class_filters:
             return False
-        for item in class_filters:
-            if tool_class_key == item or tool_class_key.startswith(f"{item}."):
-                return True
-        return False
+        if tool_class_key in class_filters:
+            return True
+        return tool_class_key.startswith(tuple(f"{item}." for item in class_filters))
 
     def _capability_cache_key(self, ctx: ToolContext) -> str:
         return "|".join(
@@ -370,49 +1019,42 @@ class ToolRuntime:
         ctype = str(connector_type or "").strip()
         cfg = config or {}
 
-        if ctype in {"github", "git"}:
-            owner = str(cfg.get("owner") or "").strip()
-            repo = str(cfg.get("repo") or "").strip()
-            token = str(cfg.get("token") or "").strip()
-            return bool(owner and repo and token)
-
-        if ctype == "bitbucket":
-            workspace = str(cfg.get("workspace") or "").strip()
-            repo = str(cfg.get("repo_slug") or cfg.get("repo") or "").strip()
-            token = str(cfg.get("token") or "").strip()
-            username = str(cfg.get("username") or "").strip()
-            app_password = str(cfg.get("app_password") or cfg.get("appPassword") or "").strip()
-            has_auth = bool(token) or bool(username and app_password)
-            return bool(workspace and repo and has_auth)
-
-        if ctype == "azure_devops":
-            organization = str(cfg.get("organization") or cfg.get("org") or "").strip()
-            project = str(cfg.get("project") or "").strip()
-            repository = str(cfg.get("repository") or cfg.get("repo") or "").strip()
-            pat = str(cfg.get("pat") or cfg.get("token") or "").strip()
-            return bool(organization and project and repository and pat)
-
-        if ctype == "jira":
-            base_url = str(cfg.get("baseUrl") or "").strip()
-            email = str(cfg.get("email") or "").strip()
-            api_token = str(cfg.get("apiToken") or "").strip()
-            return bool(base_url and email and api_token)
+        required = _CONNECTOR_REQUIRED_FIELDS.get(ctype)
+        if required is not None:
+            if not _all_nonempty(cfg, required):
+                return False
+            if ctype == "bitbucket":
+                return bool(_cfg_text(cfg, ("token",))) or _all_nonempty(cfg, (("username",), ("app_password", "appPassword")))
+            return True
 
         if ctype == "local":
             paths = cfg.get("paths")
             has_paths = isinstance(paths, list) and self._has_any_nonempty(list(paths))
-            repo_path = str(cfg.get("repo_path") or "").strip()
-            return has_paths or bool(repo_path)
+            return has_paths or bool(_cfg_text(cfg, ("repo_path",)))
 
         return False
 
-    async def _context_capabilities(self, ctx: ToolContext) -> dict[str, Any]:
+    async def _context_capabilities(self, ctx: ToolContext) -> Mapping[str, Any]:
         key = self._capability_cache_key(ctx)
-        now = time.time()
         cached = self._capability_cache.get(key)
-        if cached and now < cached[0]:
-            return dict(cached[1])
-
+        if cached and time.monotonic() < cached[0]:
+            return cached[1]
+
+        # Concurrent misses for the same key share one lookup instead of each hitting Mongo.
+        inflight = self._capability_inflight.get(key)
+        if inflight is None:
+            inflight = asyncio.ensure_future(self._load_context_capabilities(key, ctx))
+            self._capability_inflight[key] = inflight
+            inflight.add_done_callback(functools.partial(self._drop_capability_inflight, key))
+        # shield(): a cancelled caller must not cancel the lookup other callers are awaiting.
+        return await asyncio.shield(inflight)
+
+    def _drop_capability_inflight(self, key: str, fut: asyncio.Future[Mapping[str, Any]]) -> None:
+        if self._capability_inflight.get(key) is fut:
+            del self._capability_inflight[key]
+
+    async def _load_context_capabilities(self, key: str, ctx: ToolContext) -> Mapping[str, Any]:
+        now = time.monotonic()
         project_id = str(ctx.project_id or "").strip()
         access_repo = repository_factory().access_policy
         project_doc: dict[str, Any] | None = None
@@ -463,163 +1105,123 @@ class ToolRuntime:
             "has_user": has_user,
             "has_chat": has_chat,
         }
-        self._capability_cache[key] = (now + 8.0, capabilities)
-        return dict(capabilities)
+        # Read-only: the same mapping is handed to every caller until it expires.
+        frozen = MappingProxyType(capabilities)
+        self._capability_cache[key] = (now + 8.0, frozen)
+        return frozen
 
     async def _tool_capability_allowed(self, name: str, spec: ToolSpec, ctx: ToolContext) -> tuple[bool, str]:
-        if name in {
-            "list_tools",
-            "search_tools",
-            "get_tool_details",
-            "list_tool_classes",
-            "list_tools_by_class",
-            "get_tool_class_details",
-            "get_project_metadata",
-        }:
+        if name in _CAPABILITY_EXEMPT_TOOLS:
             return True, ""
 
         caps = await self._context_capabilities(ctx)
-        has_project = bool(caps.get("project_found"))
-        has_repo_read = bool(
-            caps.get("local_repo_exists")
-            or caps.get("remote_git_configured")
-            or (caps.get("browser_local_repo") and caps.get("has_user"))
-            or (caps.get("local_connector_configured") and caps.get("has_user"))
-        )
-        has_git_branch = bool(
-            caps.get("local_repo_exists")
-            or caps.get("remote_git_configured")
-            or (caps.get("browser_local_repo") and caps.get("has_user"))
-            or (caps.get("local_connector_configured") and caps.get("has_user"))
-        )
-        has_local_repo = bool(caps.get("local_repo_exists") and not caps.get("browser_local_repo"))
-        has_docs_read = bool(
-            caps.get("local_repo_exists")
-            or caps.get("remote_git_configured")
-            or (caps.get("browser_local_repo") and caps.get("has_user"))
-            or (caps.get("local_connector_configured") and caps.get("has_user"))
-        )
-        has_docs_generate = bool(
-            has_local_repo
-            or (caps.get("browser_local_repo") and caps.get("has_user"))
-            or (caps.get("local_connector_configured") and caps.get("has_user"))
-        )
-        has_git_fetch = bool(caps.get("local_repo_exists") or (caps.get("browser_local_repo") and caps.get("has_user")))
-
-        if name in {"repo_tree", "repo_grep", "open_file", "symbol_search", "git_show_file_at_ref"}:
-            return (has_repo_read, "repo_source_unavailable" if not has_repo_read else "")
-
-        if name in {
-            "create_automation",
-            "list_automations",
-            "update_automation",
-            "delete_automation",
-            "run_automation",
-            "list_automation_templates",
-        }:
-            return (has_project, "project_not_found" if not has_project else "")
-
-        if name == "read_docs_folder":
-            return (has_docs_read, "documentation_source_unavailable" if not has_docs_read else "")
-
-        if name in {"git_list_branches", "git_checkout_branch", "git_create_branch"}:
-            return (has_git_branch, "git_source_unavailable" if not has_git_branch else "")
-
-        if name == "git_fetch":
-            return (has_git_fetch, "git_source_unavailable" if not has_git_fetch else "")
-
-        if name in {
-            "git_pull",
-            "git_push",
-            "git_status",
-            "git_diff",
-            "git_log",
-            "git_stage_files",
-            "git_unstage_files",
-            "git_commit",
-            "compare_branches",
-            "run_tests",
-        }:
-            return (has_local_repo, "local_repository_unavailable" if not has_local_repo else "")
-
-        if name == "write_documentation_file":
-            return (has_docs_generate, "local_repository_unavailable" if not has_docs_generate else "")
-
-        if name == "generate_project_docs":
-            return (has_docs_generate, "local_repository_unavailable" if not has_docs_generate else "")
-
-        if name == "create_jira_issue":
-            return (bool(caps.get("jira_configured")), "jira_connector_not_configured" if not caps.get("jira_configured") else "")
-
-        if name in {"request_user_input", "read_chat_messages"}:
-            return (bool(caps.get("has_chat")), "chat_context_missing" if not caps.get("has_chat") else "")
-        if name == "workspace_get_context":
-            return (bool(caps.get("has_chat")), "chat_context_missing" if not caps.get("has_chat") else "")
+        if self._tools.get(name) is not spec:
+            return self._evaluate_capability_rule(name, spec, caps)
+        # Decisions live as long as the capability snapshot they were derived from.
+        cached = self._capability_decision_cache.get(id(caps))
+        if cached is None or cached[0] is not caps:
+            if len(self._capability_decision_cache) >= 256:
+                self._capability_decision_cache.clear()
+            cached = (caps, {})
+            self._capability_decision_cache[id(caps)] = cached
+        decisions = cached[1]
+        decision = decisions.get(name)
+        if decision is None:
+            decision = self._evaluate_capability_rule(name, spec, caps)
+            decisions[name] = decision
+        return decision
+
+    def _evaluate_capability_rule(self, name: str, spec: ToolSpec, caps: Mapping[str, Any]) -> tuple[bool, str]:
+        rule = _CAPABILITY_RULES.get(name)
+        if rule is not None:
+            check, reason = rule
+            ok = check(caps)
+            return (ok, "" if ok else reason)
 
         if spec.origin == "custom" and str(spec.runtime or "").strip() == "local_typescript":
             return (bool(caps.get("has_user")), "user_context_missing_for_local_tool" if not caps.get("has_user") else "")
 
         return True, ""
 
-    def _is_tool_allowed(self, name: str, spec: ToolSpec, policy: dict[str, Any]) -> tuple[bool, str]:
-        always_allowed = {
-            "list_tools",
-            "search_tools",
-            "get_tool_details",
-            "list_tool_classes",
-            "list_tools_by_class",
-            "get_tool_class_details",
-            "request_user_input",
-        }
-        if name in always_allowed:
+    def _build_policy_view(self, policy: Mapping[str, Any]) -> PolicyView:
+        return PolicyView(
+            allowed=frozenset(self._as_tool_name_set(policy.get("allowed_tools") or policy.get("allow_tools"))),
+            blocked=frozenset(self._as_tool_name_set(policy.get("blocked_tools") or policy.get("deny_tools"))),
+            allowed_classes=frozenset(self._as_class_key_set(policy.get("allowed_classes"))),
+            blocked_classes=frozenset(self._as_class_key_set(policy.get("blocked_classes"))),
+            approved=frozenset(self._as_tool_name_set(policy.get("approved_tools"))),
+            strict_allowlist=bool(policy.get("strict_allowlist")),
+            read_only_only=bool(policy.get("read_only_only")),
+            require_approval_for_write_tools=bool(policy.get("require_approval_for_write_tools")),
+            dry_run=bool(policy.get("dry_run")),
+            raw=policy,
+        )
+
+    def _policy_entry(self, policy: Mapping[str, Any]) -> tuple[Mapping[str, Any], PolicyView, dict[str, tuple[bool, str]]]:
+        # Only frozen policies (from _policy_dict) are cached; the held reference keeps id(policy) unique.
+        cached = self._policy_decision_cache.get(id(policy))
+        if cached is None or cached[0] is not policy:
+            if len(self._policy_decision_cache) >= 256:
+                self._policy_decision_cache.clear()
+            cached = (policy, self._build_policy_view(policy), {})
+            self._policy_decision_cache[id(policy)] = cached
+        return cached
+
+    def _policy_view(self, policy: Mapping[str, Any]) -> PolicyView:
+        if not isinstance(policy, MappingProxyType):
+            return self._build_policy_view(policy)
+        return self._policy_entry(policy)[1]
+
+    def _is_tool_allowed(self, name: str, spec: ToolSpec, policy: Mapping[str, Any]) -> tuple[bool, str]:
+        if not isinstance(policy, MappingProxyType):
+            return self._evaluate_tool_policy(name, spec, self._build_policy_view(policy))
+        _policy, view, decisions = self._policy_entry(policy)
+        if self._tools.get(name) is not spec:
+            return self._evaluate_tool_policy(name, spec, view)
+        decision = decisions.get(name)
+        if decision is None:
+            decision = self._evaluate_tool_policy(name, spec, view)
+            decisions[name] = decision
+        return decision
+
+    def _evaluate_tool_policy(self, name: str, spec: ToolSpec, view: PolicyView) -> tuple[bool, str]:
+        if name in _POLICY_EXEMPT_TOOLS:
             return True, ""
 
-        allowed = self._as_tool_name_set(policy.get("allowed_tools") or policy.get("allow_tools"))
-        blocked = self._as_tool_name_set(policy.get("blocked_tools") or policy.get("deny_tools"))
-        allowed_classes = self._as_class_key_set(policy.get("allowed_classes"))
-        blocked_classes = self._as_class_key_set(policy.get("blocked_classes"))
-        approved = self._as_tool_name_set(policy.get("approved_tools"))
-        class_key = self._effective_spec_class_key(name, spec)
+        class_key = self._spec_class_key(name, spec)
 
-        if name in blocked:
+        if name in view.blocked:
             return False, "blocked_by_policy"
-        explicit_allow = name in allowed
+        explicit_allow = name in view.allowed
 
-        if not explicit_allow and self._class_key_matches(class_key, blocked_classes):
+        if not explicit_allow and self._class_key_matches(class_key, view.blocked_classes):
             return False, "blocked_by_class_policy"
 
-        strict_allowlist = bool(policy.get("strict_allowlist"))
-        class_allowed = self._class_key_matches(class_key, allowed_classes)
-        if strict_allowlist and not explicit_allow and not class_allowed:
+        class_allowed = self._class_key_matches(class_key, view.allowed_classes)
+        if view.strict_allowlist and not explicit_allow and not class_allowed:
             return False, "not_in_allowed_tools_or_classes"
 
-        read_only_only = bool(policy.get("read_only_only"))
-        if read_only_only and not spec.read_only:
+        if view.read_only_only and not spec.read_only:
             return False, "read_only_only_mode"
-        if bool(policy.get("require_approval_for_write_tools")) and not spec.read_only and name not in approved:
+        if view.require_approval_for_write_tools and not spec.read_only and name not in view.approved:
             return False, "write_approval_required"
-        if spec.require_approval and name not in approved:
+        if spec.require_approval and name not in view.approved:
             return False, "approval_required"
 
         return True, ""
 
     async def _invoke_handler(self, spec: ToolSpec, payload: BaseModel, ctx: ToolContext) -> Any:
-        try:
-            sig = inspect.signature(spec.handler)
-            param_count = len(sig.parameters)
-        except Exception:
-            param_count = 1
-        if param_count >= 2:
+        if spec.handler_param_count >= 2:
             return await spec.handler(payload, ctx)
         return await spec.handler(payload)
 
     def _forbidden_error(self, name: str, reason: str) -> ToolEnvelope:
-        return ToolEnvelope(
+        return ToolEnvelope.model_construct(
             tool=name,
             ok=False,
             duration_ms=0,
             attempts=1,
-            error=ToolError(
+            error=ToolError.model_construct(
                 code="forbidden",
                 message=f"Tool '{name}' is disabled by policy ({reason})",
                 retryable=False,
@@ -627,47 +1229,28 @@ class ToolRuntime:
             ),
         )
 
-    def _cache_key(self, name: str, merged: dict[str, Any]) -> str:
-        raw = json.dumps({"tool": name, "args": merged}, ensure_ascii=False, sort_keys=True, default=str)
-        digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()
+    def _cache_key(self, name: str, input_encoded: bytes) -> str:
+        # Non-cryptographic lookup key: a 128-bit BLAKE2b digest of the canonical argument JSON.
+        digest = hashlib.blake2b(input_encoded, digest_size=16).hexdigest()
         return f"{name}:{digest}"
 
     def _transient_execution_error(self, err: Exception) -> bool:
-        msg = str(err).lower()
+        if isinstance(err, _TRANSIENT_EXC_TYPES):
+            return True
+        msg = str(err)
         if not msg:
             return False
-        markers = (
-            "timeout",
-            "timed out",
-            "temporarily unavailable",
-            "connection reset",
-            "connection refused",
-            "connection aborted",
-            "too many requests",
-            "rate limit",
-            "429",
-            "502",
-            "503",
-            "504",
-        )
-        return any(m in msg for m in markers)
+        return _TRANSIENT_ERROR_RE.search(msg) is not None
 
-    def _allowed_arg_names(self, model_cls: type[BaseModel]) -> set[str]:
-        allowed: set[str] = set()
-        fields = getattr(model_cls, "model_fields", None)
-        if fields is None:
-            fields = getattr(model_cls, "__fields__", {})
-
-        for fname, f in fields.items():
-            allowed.add(fname)
-            alias = getattr(f, "alias", None)
-            if alias:
-                allowed.add(str(alias))
-        return allowed
+    def _allowed_arg_names(self, model_cls: type[BaseModel]) -> frozenset[str]:
+        return _model_arg_names(model_cls)
 
-    def _merge_context_defaults(self, model_cls: type[BaseModel], args: dict[str, Any], ctx: ToolContext) -> dict[str, Any]:
-        out = dict(args or {})
-        names = self._field_names(model_cls)
+    def _merge_context_defaults(self, spec: ToolSpec, args: dict[str, Any], ctx: ToolContext) -> dict[str, Any]:
+        # Always a copy: callers (e.g. agent2) keep emitting/logging their own args dict after execute().
+        out = {**args} if args else {}
+        names = spec.context_fields
+        if not names:
+            return out
 
         # Always pin tool calls to the active project/user/chat context.
         # This prevents model hallucinations from routing tools to wrong chats/projects.
@@ -690,11 +1273,11 @@ class ToolRuntime:
         return out
 
     def _rate_limit_error(self, name: str, limit: int) -> ToolEnvelope:
-        return ToolEnvelope(
+        return ToolEnvelope.model_construct(
             tool=name,
             ok=False,
             duration_ms=0,
-            error=ToolError(
+            error=ToolError.model_construct(
                 code="rate_limited",
                 message=f"Tool '{name}' rate limited ({limit}/min)",
                 retryable=True,
@@ -702,11 +1285,11 @@ class ToolRuntime:
         )
 
     def _unknown_tool_error(self, name: str) -> ToolEnvelope:
-        return ToolEnvelope(
+        return ToolEnvelope.model_construct(
             tool=name,
             ok=False,
             duration_ms=0,
-            error=ToolError(code="unknown_tool", message=f"Unknown tool: {name}", retryable=False),
+            error=ToolError.model_construct(code="unknown_tool", message=f"Unknown tool: {name}", retryable=False),
         )
 
     async def execute(self, name: str, args: dict[str, Any], ctx: ToolContext) -> ToolEnvelope:
@@ -716,17 +1299,19 @@ class ToolRuntime:
             return self._unknown_tool_error(name)
 
         policy = self._policy_dict(ctx)
-        logger.info(
-            "tool.execute.start tool=%s project=%s chat=%s branch=%s read_only_only=%s allowed=%s blocked=%s arg_keys=%s",
-            name,
-            ctx.project_id,
-            ctx.chat_id or "",
-            ctx.branch,
-            bool(policy.get("read_only_only")),
-            len(self._as_tool_name_set(policy.get("allowed_tools") or policy.get("allow_tools"))),
-            len(self._as_tool_name_set(policy.get("blocked_tools") or policy.get("deny_tools"))),
-            sorted(list((args or {}).keys())),
-        )
+        view = self._policy_view(policy)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "tool.execute.start tool=%s project=%s chat=%s branch=%s read_only_only=%s allowed=%s blocked=%s arg_keys=%s",
+                name,
+                ctx.project_id,
+                ctx.chat_id or "",
+                ctx.branch,
+                view.read_only_only,
+                len(view.allowed),
+                len(view.blocked),
+                sorted((args or {}).keys()),
+            )
         allowed, reason = self._is_tool_allowed(name, spec, policy)
         if not allowed:
             logger.warning("tool.forbidden tool=%s reason=%s", name, reason)
@@ -750,7 +1335,7 @@ class ToolRuntime:
             key="rate_limit_overrides",
             fallback=spec.rate_limit_per_min,
             min_value=1,
-            max_value=6000,
+            max_value=_RATE_LIMIT_MAX_PER_MIN,
         )
         effective_retries = self._tool_override_int(
             policy,
@@ -769,30 +1354,40 @@ class ToolRuntime:
             max_value=3600,
         )
 
-        now = time.time()
-        window = self._windows[name]
-        while window and now - window[0] > 60.0:
-            window.popleft()
-        if len(window) >= max(1, effective_rate):
-            logger.warning("tool.rate_limited tool=%s in_window=%s limit=%s", name, len(window), effective_rate)
-            return self._rate_limit_error(name, effective_rate)
+        # Monotonic clock for both the rate window and result-cache expiry; wall-clock jumps can't skew them.
+        now = time.monotonic()
+        rate_limit = max(1, effective_rate)
+        window = self._windows.get(name)
+        if window is None or (window.maxlen or 0) < rate_limit:
+            window = deque(window or (), maxlen=max(rate_limit, _RATE_WINDOW_MIN_LEN))
+            self._windows[name] = window
+        # Expired entries only matter once the window is full; below the limit the call is allowed either way.
+        if len(window) >= rate_limit:
+            while window and now - window[0] > 60.0:
+                window.popleft()
+            if len(window) >= rate_limit:
+                logger.warning("tool.rate_limited tool=%s in_window=%s limit=%s", name, len(window), effective_rate)
+                return self._rate_limit_error(name, effective_rate)
         window.append(now)
 
-        merged = self._merge_context_defaults(spec.model, args or {}, ctx)
-        input_raw = json.dumps(merged, ensure_ascii=False, default=str)
+        merged = self._merge_context_defaults(spec, args or {}, ctx)
+        cacheable = spec.read_only and effective_cache_ttl > 0
+        # Only cache keys need canonical (sorted) JSON; key order does not change the byte count.
+        input_encoded = (_JSON_SORTED_ENCODER if cacheable else _JSON_ENCODER).encode(merged).encode("utf-8")
+        input_bytes = len(input_encoded)
         started = time.perf_counter()
 
-        unknown_keys = sorted(set(merged.keys()) - self._allowed_arg_names(spec.model))
-        if unknown_keys and not spec.allow_extra_args:
-            duration_ms = int((time.perf_counter() - started) * 1000)
+        unknown_keys = [] if spec.allow_extra_args else sorted(merged.keys() - spec.allowed_arg_names)
+        if unknown_keys:
+            duration_ms = _elapsed_ms(started)
             details = {"unknown_args": unknown_keys}
             logger.warning("tool.validation_failed tool=%s unknown_args=%s", name, unknown_keys)
-            return ToolEnvelope(
+            return ToolEnvelope.model_construct(
                 tool=name,
                 ok=False,
                 duration_ms=duration_ms,
-                input_bytes=len(input_raw.encode("utf-8")),
-                error=ToolError(
+                input_bytes=input_bytes,
+                error=ToolError.model_construct(
                     code="validation_error",
                     message="Tool argument validation failed",
                     retryable=False,
@@ -800,37 +1395,37 @@ class ToolRuntime:
                 ),
             )
 
-        cache_key = self._cache_key(name, merged)
-        if spec.read_only and effective_cache_ttl > 0:
+        cache_key = self._cache_key(name, input_encoded) if cacheable else ""
+        tag_stamp: tuple[int, ...] = ()
+        if cacheable:
+            # Taken before the handler runs, so a write that lands mid-call still invalidates this result.
+            tag_stamp = self._cache_tag_stamp(spec)
             cached_item = self._cache.get(cache_key)
             if cached_item:
-                expires_at, cached_envelope = cached_item
-                if now < expires_at:
-                    data = cached_envelope.model_dump()
-                    data["cached"] = True
-                    data["duration_ms"] = 0
-                    data["attempts"] = 1
+                expires_at, cached_envelope, cached_stamp = cached_item
+                if now < expires_at and cached_stamp == tag_stamp:
+                    self._cache.move_to_end(cache_key)
                     logger.info("tool.cache_hit tool=%s ttl_remaining=%.2fs", name, max(0.0, expires_at - now))
-                    if hasattr(ToolEnvelope, "model_validate"):
-                        return ToolEnvelope.model_validate(data)
-                    return ToolEnvelope.parse_obj(data)
+                    # The cached envelope was built by the runtime when it was stored; copy it instead of re-validating.
+                    update = {"cached": True, "duration_ms": 0, "attempts": 1}
+                    if hasattr(cached_envelope, "model_copy"):
+                        return cached_envelope.model_copy(update=update)
+                    return cached_envelope.copy(update=update)
                 self._cache.pop(cache_key, None)
 
         try:
-            if hasattr(spec.model, "model_validate"):
-                payload = spec.model.model_validate(merged)
-            else:
-                payload = spec.model.parse_obj(merged)
+            build_payload = spec.payload_builder or _resolve_payload_builder(spec.model, spec.trusted_args)
+            payload = build_payload(merged)
         except ValidationError as err:
-            duration_ms = int((time.perf_counter() - started) * 1000)
+            duration_ms = _elapsed_ms(started)
             details = {"errors": err.errors()}
             logger.warning("tool.validation_failed tool=%s errors=%s", name, details)
-            return ToolEnvelope(
+            return ToolEnvelope.model_construct(
                 tool=name,
                 ok=False,
                 duration_ms=duration_ms,
-                input_bytes=len(input_raw.encode("utf-8")),
-                error=ToolError(
+                input_bytes=input_bytes,
+                error=ToolError.model_construct(
                     code="validation_error",
                     message="Tool argument validation failed",
                     retryable=False,
@@ -838,8 +1433,8 @@ class ToolRuntime:
                 ),
             )
 
-        if bool(policy.get("dry_run")) and not spec.read_only:
-            duration_ms = int((time.perf_counter() - started) * 1000)
+        if view.dry_run and not spec.read_only:
+            duration_ms = _elapsed_ms(started)
             dry_result = {
                 "dry_run": True,
                 "skipped": True,
@@ -847,267 +1442,203 @@ class ToolRuntime:
                 "tool": name,
                 "args": merged,
             }
-            result_raw = json.dumps(dry_result, ensure_ascii=False, default=str)
+            result_bytes = len(_JSON_ENCODER.encode(dry_result).encode("utf-8"))
             logger.info(
                 "tool.dry_run_skip tool=%s duration_ms=%s input_bytes=%s result_bytes=%s",
                 name,
                 duration_ms,
-                len(input_raw.encode("utf-8")),
-                len(result_raw.encode("utf-8")),
+                input_bytes,
+                result_bytes,
             )
-            return ToolEnvelope(
+            return ToolEnvelope.model_construct(
                 tool=name,
                 ok=True,
                 duration_ms=duration_ms,
                 attempts=1,
-                input_bytes=len(input_raw.encode("utf-8")),
-                result_bytes=len(result_raw.encode("utf-8")),
+                input_bytes=input_bytes,
+                result_bytes=result_bytes,
                 result=dry_result,
             )
 
-        attempts = 0
         result_obj: Any = None
-        while True:
-            attempts += 1
+        # One pass per allowed attempt; every failure either returns from its except arm or falls through to the backoff.
+        for attempts in range(1, max(0, effective_retries) + 2):
             try:
-                result_obj = await asyncio.wait_for(self._invoke_handler(spec, payload, ctx), timeout=max(1, effective_timeout))
+                # One loop timer per attempt, awaited inline: no wrapper task per call (asyncio.wait_for spawns one before 3.12).
+                async with asyncio.timeout(max(1, effective_timeout)):
+                    result_obj = await self._invoke_handler(spec, payload, ctx)
                 break
             except asyncio.TimeoutError:
-                duration_ms = int((time.perf_counter() - started) * 1000)
-                if attempts <= effective_retries:
-                    logger.warning(
-                        "tool.timeout_retry tool=%s attempt=%s/%s timeout_sec=%s",
-                        name,
-                        attempts,
-                        effective_retries + 1,
-                        effective_timeout,
+                if attempts > effective_retries or not self._acquire_retry(name, spec, effective_retries):
+                    duration_ms = _elapsed_ms(started)
+                    logger.warning("tool.timeout tool=%s timeout_sec=%s attempts=%s", name, effective_timeout, attempts)
+                    return ToolEnvelope.model_construct(
+                        tool=name,
+                        ok=False,
+                        duration_ms=duration_ms,
+                        attempts=attempts,
+                        input_bytes=input_bytes,
+                        error=ToolError.model_construct(
+                            code="timeout",
+                            message=f"Tool '{name}' timed out",
+                            retryable=False,
+                            details={"timeout_sec": effective_timeout},
+                        ),
                     )
-                    await asyncio.sleep(min(1.0, 0.2 * attempts))
-                    continue
-                logger.warning("tool.timeout tool=%s timeout_sec=%s attempts=%s", name, effective_timeout, attempts)
-                return ToolEnvelope(
-                    tool=name,
-                    ok=False,
-                    duration_ms=duration_ms,
-                    attempts=attempts,
-                    input_bytes=len(input_raw.encode("utf-8")),
-                    error=ToolError(
-                        code="timeout",
-                        message=f"Tool '{name}' timed out",
-                        retryable=False,
-                        details={"timeout_sec": effective_timeout},
-                    ),
+                logger.warning(
+                    "tool.timeout_retry tool=%s attempt=%s/%s timeout_sec=%s",
+                    name,
+                    attempts,
+                    effective_retries + 1,
+                    effective_timeout,
                 )
             except Exception as err:
                 retryable = self._transient_execution_error(err)
-                if retryable and attempts <= effective_retries:
-                    logger.warning(
-                        "tool.execution_retry tool=%s attempt=%s/%s err=%s",
-                        name,
-                        attempts,
-                        effective_retries + 1,
-                        err,
+                if not retryable or attempts > effective_retries or not self._acquire_retry(name, spec, effective_retries):
+                    duration_ms = _elapsed_ms(started)
+                    logger.exception("tool.execution_failed tool=%s attempts=%s", name, attempts)
+                    return ToolEnvelope.model_construct(
+                        tool=name,
+                        ok=False,
+                        duration_ms=duration_ms,
+                        attempts=attempts,
+                        input_bytes=input_bytes,
+                        error=ToolError.model_construct(
+                            code="execution_error",
+                            message=str(err),
+                            retryable=retryable,
+                        ),
                     )
-                    await asyncio.sleep(min(1.0, 0.2 * attempts))
-                    continue
-
-                duration_ms = int((time.perf_counter() - started) * 1000)
-                logger.exception("tool.execution_failed tool=%s attempts=%s", name, attempts)
-                return ToolEnvelope(
-                    tool=name,
-                    ok=False,
-                    duration_ms=duration_ms,
-                    attempts=attempts,
-                    input_bytes=len(input_raw.encode("utf-8")),
-                    error=ToolError(
-                        code="execution_error",
-                        message=str(err),
-                        retryable=retryable,
-                    ),
+                logger.warning(
+                    "tool.execution_retry tool=%s attempt=%s/%s err=%s",
+                    name,
+                    attempts,
+                    effective_retries + 1,
+                    err,
                 )
-
-        if hasattr(result_obj, "model_dump"):
-            result = result_obj.model_dump()
-        elif hasattr(result_obj, "dict"):
-            result = result_obj.dict()
-        else:
-            result = result_obj
-
-        result_raw = json.dumps(result, ensure_ascii=False, default=str)
-        duration_ms = int((time.perf_counter() - started) * 1000)
+            await asyncio.sleep(_RETRY_BACKOFF_SEC[min(attempts, len(_RETRY_BACKOFF_SEC) - 1)])
+
+        # Handlers return one shape in practice; re-resolve only if the result type changes.
+        result_type = type(result_obj)
+        resolved = spec.result_dumper
+        if resolved is None or resolved[0] is not result_type:
+            resolved = (result_type, _resolve_result_dumper(result_type))
+            spec.result_dumper = resolved
+        dumper = resolved[1]
+        result = dumper(result_obj) if dumper is not None else result_obj
+
+        result_bytes = len(_JSON_ENCODER.encode(result).encode("utf-8"))
+        duration_ms = _elapsed_ms(started)
         logger.info(
             "tool.success tool=%s duration_ms=%s input_bytes=%s result_bytes=%s",
             name,
             duration_ms,
-            len(input_raw.encode("utf-8")),
-            len(result_raw.encode("utf-8")),
+            input_bytes,
+            result_bytes,
         )
-        envelope = ToolEnvelope(
+        # Envelope fields are produced by the runtime itself, so they are constructed without re-validation.
+        envelope = ToolEnvelope.model_construct(
             tool=name,
             ok=True,
             duration_ms=duration_ms,
             attempts=attempts,
-            input_bytes=len(input_raw.encode("utf-8")),
-            result_bytes=len(result_raw.encode("utf-8")),
+            input_bytes=input_bytes,
+            result_bytes=result_bytes,
             result=result,
         )
-        if spec.read_only and effective_cache_ttl > 0:
-            self._cache[cache_key] = (time.time() + effective_cache_ttl, envelope)
+        if cacheable:
+            ttl = effective_cache_ttl * random.uniform(1.0 - _RESULT_CACHE_TTL_JITTER, 1.0 + _RESULT_CACHE_TTL_JITTER)
+            self._result_cache_put(cache_key, time.monotonic() + ttl, envelope, tag_stamp)
+        if spec.invalidates_tags:
+            self._bump_cache_tags(spec.invalidates_tags)
         return envelope
 
     def schema_text(self) -> str:
-        lines: list[str] = []
-        for name in self.tool_names():
-            spec = self._tools[name]
-            class_key = self._effective_spec_class_key(name, spec)
-            lines.append(name)
-            lines.append(f"  Description: {spec.description}")
-            lines.append(f"  Class: {class_key} ({class_key_to_path(class_key)})")
-            lines.append(f"  Timeout: {spec.timeout_sec}s")
-            lines.append(f"  Rate limit: {spec.rate_limit_per_min}/min")
-            lines.append(f"  Retries: {spec.max_retries}")
-            lines.append(f"  Read only: {str(bool(spec.read_only)).lower()}")
-            if spec.require_approval:
-                lines.append("  Requires approval: true")
-            if spec.origin != "builtin":
-                lines.append(f"  Origin: {spec.origin}")
-            if spec.runtime:
-                lines.append(f"  Runtime: {spec.runtime}")
-            if spec.version:
-                lines.append(f"  Version: {spec.version}")
-            if spec.cache_ttl_sec > 0:
-                lines.append(f"  Cache TTL: {spec.cache_ttl_sec}s")
-            lines.append("  Parameters:")
-
-            model = spec.model
-            fields = getattr(model, "model_fields", None)
-            if fields is None:
-                fields = getattr(model, "__fields__", {})
-
-            if not fields:
-                lines.append("  - none")
-            else:
-                for fname, f in fields.items():
-                    ann = getattr(f, "annotation", None) or getattr(f, "outer_type_", Any)
-                    type_name = getattr(ann, "__name__", str(ann))
-                    required = False
-                    if hasattr(f, "is_required"):
-                        required = bool(f.is_required())
-                    elif hasattr(f, "required"):
-                        required = bool(getattr(f, "required"))
-                    req = "REQUIRED" if required else "OPTIONAL"
-                    lines.append(f"  - {fname}: {type_name} ({req})")
-            lines.append("")
-        return "\n".join(lines).rstrip() + "\n"
+        cached = self._schema_text_cache
+        if cached is not None:
+            return cached
+        blocks = [self._tools[name].schema_block for name in self.tool_names()]
+        text = "\n\n".join(blocks).rstrip() + "\n"
+        self._schema_text_cache = text
+        return text
 
     def catalog(self) -> list[dict[str, Any]]:
-        out: list[dict[str, Any]] = []
+        return [entry.row for entry in self._catalog_entries()]
+
+    def _build_catalog_entries(self) -> list[_CatalogEntry]:
+        entries: list[_CatalogEntry] = []
         for name in self.tool_names():
             spec = self._tools[name]
-            fields_meta: list[dict[str, Any]] = []
-            fields = getattr(spec.model, "model_fields", None)
-            if fields is None:
-                fields = getattr(spec.model, "__fields__", {})
-
-            for fname, f in fields.items():
-                ann = getattr(f, "annotation", None) or getattr(f, "outer_type_", Any)
-                type_name = getattr(ann, "__name__", str(ann))
-                required = False
-                if hasattr(f, "is_required"):
-                    required = bool(f.is_required())
-                elif hasattr(f, "required"):
-                    required = bool(getattr(f, "required"))
-                fields_meta.append(
-                    {
-                        "name": fname,
-                        "type": type_name,
-                        "required": required,
-                    }
-                )
-
-            out.append(
-                {
-                    "name": name,
-                    "description": spec.description,
-                    "class_key": self._effective_spec_class_key(name, spec),
-                    "class_path": class_key_to_path(self._effective_spec_class_key(name, spec)),
-                    "class_display": spec.class_display or self._default_class_display(self._effective_spec_class_key(name, spec)),
-                    "class_origin": "custom" if spec.origin == "custom" else "builtin",
-                    "timeout_sec": spec.timeout_sec,
-                    "rate_limit_per_min": spec.rate_limit_per_min,
-                    "max_retries": spec.max_retries,
-                    "cache_ttl_sec": spec.cache_ttl_sec,
-                    "read_only": spec.read_only,
-                    "require_approval": spec.require_approval,
-                    "origin": spec.origin,
-                    "runtime": spec.runtime,
-                    "version": spec.version,
-                    "parameters": fields_meta,
-                }
-            )
-        return out
+            class_key = spec.resolved_class_key
+            row = {
+                "name": name,
+                "description": spec.description,
+                "class_key": class_key,
+                "class_path": spec.resolved_class_path,
+                "class_display": spec.class_display or self._default_class_display(class_key),
+                "class_origin": "custom" if spec.origin == "custom" else "builtin",
+                "timeout_sec": spec.timeout_sec,
+                "rate_limit_per_min": spec.rate_limit_per_min,
+                "max_retries": spec.max_retries,
+                "cache_ttl_sec": spec.cache_ttl_sec,
+                "read_only": spec.read_only,
+                "require_approval": spec.require_approval,
+                "origin": spec.origin,
+                "runtime": spec.runtime,
+                "version": spec.version,
+                "parameters": spec.fields_meta,
+            }
+            brief_row = {k: v for k, v in row.items() if k != "parameters"}
+            entries.append(_CatalogEntry(name=name, spec=spec, row=row, brief_row=brief_row))
+        self._catalog_cache = entries
+        self._catalog_index = {entry.name: entry for entry in entries}
+        return entries
 
     async def available_tool_names(self, ctx: ToolContext) -> set[str]:
-        rows = await _catalog_with_policy(
-            self,
-            ctx,
-            include_unavailable=False,
-            include_parameters=False,
-            limit=5000,
-        )
-        return {str(row.get("name") or "").strip() for row in rows if str(row.get("name") or "").strip()}
+        return await self._allowed_names(ctx)
+
+    async def _allowed_names(self, ctx: ToolContext) -> set[str]:
+        # Same availability rules as _catalog_with_policy, without building catalog rows.
+        policy = self._policy_dict(ctx)
+        out: set[str] = set()
+        for name, spec in list(self._tools.items()):
+            allowed, _reason = self._is_tool_allowed(name, spec, policy)
+            if not allowed:
+                continue
+            capability_allowed, _capability_reason = await self._tool_capability_allowed(name, spec, ctx)
+            if capability_allowed:
+                out.add(name)
+        return out
 
     async def schema_text_for_context(self, ctx: ToolContext, *, include_unavailable: bool = False) -> str:
+        cache_key = self._policy_catalog_key(ctx, self._policy_dict(ctx), "schema_text", bool(include_unavailable))
+        cached = self._ttl_cache_get(self._context_schema_text_cache, cache_key)
+        if isinstance(cached, str):
+            return cached
+        # Only tool names are read here; the rendered text comes from each spec's precomputed block.
         rows = await _catalog_with_policy(
             self,
             ctx,
             include_unavailable=bool(include_unavailable),
-            include_parameters=True,
+            include_parameters=False,
             limit=5000,
         )
-        lines: list[str] = []
+        blocks: list[str] = []
         for row in rows:
-            name = str(row.get("name") or "").strip()
-            if not name:
-                continue
-            lines.append(name)
-            lines.append(f"  Description: {str(row.get('description') or '')}")
-            lines.append(
-                f"  Class: {str(row.get('class_key') or '')} ({str(row.get('class_path') or '')})"
-            )
-            lines.append(f"  Timeout: {int(row.get('timeout_sec') or 0)}s")
-            lines.append(f"  Rate limit: {int(row.get('rate_limit_per_min') or 0)}/min")
-            lines.append(f"  Retries: {int(row.get('max_retries') or 0)}")
-            lines.append(f"  Read only: {str(bool(row.get('read_only'))).lower()}")
-            if bool(row.get("require_approval")):
-                lines.append("  Requires approval: true")
-            origin = str(row.get("origin") or "").strip()
-            if origin and origin != "builtin":
-                lines.append(f"  Origin: {origin}")
-            runtime = str(row.get("runtime") or "").strip()
-            if runtime:
-                lines.append(f"  Runtime: {runtime}")
-            version = str(row.get("version") or "").strip()
-            if version:
-                lines.append(f"  Version: {version}")
-            ttl = int(row.get("cache_ttl_sec") or 0)
-            if ttl > 0:
-                lines.append(f"  Cache TTL: {ttl}s")
-            lines.append("  Parameters:")
-            params = row.get("parameters")
-            if not isinstance(params, list) or not params:
-                lines.append("  - none")
-            else:
-                for p in params:
-                    if not isinstance(p, dict):
-                        continue
-                    p_name = str(p.get("name") or "").strip()
-                    p_type = str(p.get("type") or "Any").strip() or "Any"
-                    req = "REQUIRED" if bool(p.get("required")) else "OPTIONAL"
-                    if p_name:
-                        lines.append(f"  - {p_name}: {p_type} ({req})")
-            lines.append("")
-        return ("\n".join(lines).rstrip() + "\n") if lines else ""
+            spec = self._tools.get(row["name"])
+            if spec:
+                blocks.append(spec.schema_block)
+        text = ("\n\n".join(blocks).rstrip() + "\n") if blocks else ""
+        self._ttl_cache_put(self._context_schema_text_cache, cache_key, text, 5.0)
+        return text
+
+
+def _elapsed_ms(started: float) -> int:
+    return int((time.perf_counter() - started) * 1000)
+
+
+def _clamp_limit(raw: Any, default: int, max_value: int) -> int:
+    return max(1, min(int(raw or default), max_value))
 
 
 def _meta_handler(req: GetProjectMetadataRequest):
@@ -1130,6 +1661,18 @@ def _show_file_handler(req: GitShowFileAtRefRequest):
     return open_file(open_req)
 
 
+def _rows_for_classes(index: _DiscoveryIndex, class_keys: Any) -> list[_DiscoveryRow]:
+    # Class slices instead of a scan over every tool; re-merged into catalog (name) order.
+    slices = [index.by_class[key] for key in class_keys if key in index.by_class]
+    if len(slices) == 1:
+        return list(slices[0])
+    return sorted((row for class_slice in slices for row in class_slice), key=_discovery_row_name)
+
+
+def _discovery_row_name(row: _DiscoveryRow) -> str:
+    return row.entry.name
+
+
 async def _catalog_with_policy(
     runtime: ToolRuntime,
     ctx: ToolContext,
@@ -1140,87 +1683,111 @@ async def _catalog_with_policy(
     include_subclasses: bool = True,
     query: str | None = None,
     limit: int = 200,
-) -> list[dict[str, Any]]:
+    single_name: str | None = None,
+    counts_only: bool = False,
+) -> list[Any]:
     query_lc = str(query or "").strip().lower()
     class_filter = normalize_class_key(class_key)
+    effective_limit = _clamp_limit(limit, 200, 1000)
     policy = runtime._policy_dict(ctx)
-    rows = runtime.catalog()
+    cache_key = runtime._policy_catalog_key(
+        ctx,
+        policy,
+        bool(include_unavailable),
+        bool(include_parameters),
+        class_filter,
+        bool(include_subclasses),
+        query_lc,
+        effective_limit,
+        single_name,
+        bool(counts_only),
+    )
+    cached = runtime._ttl_cache_get(runtime._policy_catalog_cache, cache_key)
+    if cached is not None:
+        return list(cached)
     class_rows = await runtime._load_tool_classes_cached()
-    class_rows_map = tool_class_map(class_rows)
+    index = runtime._discovery_index(class_rows)
     allowed_class_keys: set[str] | None = None
     if class_filter:
         if include_subclasses:
             allowed_class_keys = class_descendants(class_rows, class_filter)
         else:
             allowed_class_keys = {class_filter}
-    out: list[dict[str, Any]] = []
-
-    for row in rows:
-        name = str(row.get("name") or "").strip()
-        if not name:
+    discovery: Iterable[_DiscoveryRow]
+    if single_name is not None:
+        single_row = index.by_name.get(single_name)
+        discovery = (single_row,) if single_row else ()
+    elif allowed_class_keys is not None:
+        discovery = _rows_for_classes(index, allowed_class_keys)
+    else:
+        discovery = index.rows
+    # Pass 1 (synchronous): class filter, search filter and static policy checks.
+    candidates: list[_CatalogCandidate] = []
+    for row in discovery:
+        if allowed_class_keys is not None and row.class_key not in allowed_class_keys:
             continue
-        spec = runtime._tools.get(name)
-        if not spec:
+        entry = row.entry
+        spec = entry.spec
+        if query_lc and query_lc not in spec.search_haystack and query_lc not in row.class_display_lc:
             continue
-        effective_class_key = runtime._effective_spec_class_key(name, spec)
-        class_row = class_rows_map.get(effective_class_key)
-        class_display = (
-            str((class_row or {}).get("display_name") or "")
-            or spec.class_display
-            or runtime._default_class_display(effective_class_key)
-        )
-        class_origin = str((class_row or {}).get("origin") or ("custom" if spec.origin == "custom" else "builtin"))
-        class_chain = class_path_chain(class_rows, effective_class_key)
 
-        if allowed_class_keys is not None and effective_class_key not in allowed_class_keys:
+        allowed, reason = runtime._is_tool_allowed(entry.name, spec, policy)
+        if not include_unavailable and not allowed:
             continue
+        candidates.append(_CatalogCandidate(entry, row.class_key, row.class_display, row.class_origin, allowed, reason))
+        # Every candidate is emitted when unavailable tools are included, so later ones cannot make the cut.
+        if include_unavailable and len(candidates) >= effective_limit:
+            break
+
+    # Pass 2: capability checks for policy-allowed candidates, awaited concurrently.
+    pending = [c for c in candidates if c.allowed]
+    decisions: list[tuple[bool, str]] = []
+    if pending:
+        # The first check warms the shared capability snapshot so the gathered checks reuse it.
+        first = pending[0]
+        decisions.append(await runtime._tool_capability_allowed(first.entry.name, first.entry.spec, ctx))
+        decisions.extend(
+            await asyncio.gather(
+                *(runtime._tool_capability_allowed(c.entry.name, c.entry.spec, ctx) for c in pending[1:])
+            )
+        )
+    capability_by_name = {c.entry.name: decision for c, decision in zip(pending, decisions, strict=True)}
 
-        allowed, reason = runtime._is_tool_allowed(name, spec, policy)
+    out: list[Any] = []
+    for c in candidates:
+        allowed, reason = c.allowed, c.reason
         if allowed:
-            capability_allowed, capability_reason = await runtime._tool_capability_allowed(name, spec, ctx)
+            capability_allowed, capability_reason = capability_by_name[c.entry.name]
             if not capability_allowed:
                 allowed = False
                 reason = capability_reason
         if not include_unavailable and not allowed:
             continue
+        if counts_only:
+            # Class tallies only need the effective class and availability, not a full row.
+            out.append((c.class_key, bool(allowed)))
+            if len(out) >= effective_limit:
+                break
+            continue
 
-        if query_lc:
-            hay_parts: list[str] = [
-                name,
-                str(row.get("description") or ""),
-                str(row.get("origin") or ""),
-                str(row.get("runtime") or ""),
-                str(row.get("version") or ""),
-                effective_class_key,
-                class_display,
-                class_key_to_path(effective_class_key),
-            ]
-            params = row.get("parameters")
-            if isinstance(params, list):
-                for p in params:
-                    if not isinstance(p, dict):
-                        continue
-                    hay_parts.append(str(p.get("name") or ""))
-                    hay_parts.append(str(p.get("type") or ""))
-            hay = " ".join(hay_parts).lower()
-            if query_lc not in hay:
-                continue
-
-        item = dict(row)
-        item["class_key"] = effective_class_key
-        item["class_path"] = class_key_to_path(effective_class_key)
-        item["class_display"] = class_display
-        item["class_origin"] = class_origin
-        item["class_chain"] = class_chain
-        item["available"] = bool(allowed)
+        # Catalog rows already carry the effective class_key/class_path; only per-context fields are overlaid.
+        base = c.entry.row if include_parameters else c.entry.brief_row
+        item = {
+            **base,
+            "class_display": c.class_display,
+            "class_origin": c.class_origin,
+            "class_chain": class_path_chain(class_rows, c.class_key),
+            "available": bool(allowed),
+        }
         if not allowed:
             item["blocked_reason"] = reason
-        if not include_parameters:
-            item.pop("parameters", None)
         out.append(item)
+        # Catalog rows are already ordered by tool name, so the first `effective_limit` matches are the answer.
+        if len(out) >= effective_limit:
+            break
 
-    out.sort(key=lambda x: str(x.get("name") or ""))
-    return out[: max(1, min(int(limit or 200), 1000))]
+    runtime._ttl_cache_put(runtime._policy_catalog_cache, cache_key, list(out), 5.0)
+    return out
 
 
 async def _classes_with_policy(
@@ -1232,25 +1799,25 @@ async def _classes_with_policy(
     limit: int = 200,
 ) -> list[dict[str, Any]]:
     class_rows = await runtime._load_tool_classes_cached()
-    by_key = tool_class_map(class_rows)
+    by_key = runtime._tool_class_map(class_rows)
     class_stats: dict[str, dict[str, int]] = {}
     for key in by_key.keys():
         class_stats[key] = {"total": 0, "available": 0}
 
-    tools = await _catalog_with_policy(
+    tallies = await _catalog_with_policy(
         runtime,
         ctx,
         include_unavailable=True,
         include_parameters=False,
         limit=5000,
+        counts_only=True,
     )
-    for tool in tools:
-        c_key = normalize_class_key(tool.get("class_key"))
+    for c_key, available in tallies:
         if not c_key:
             continue
         stat = class_stats.setdefault(c_key, {"total": 0, "available": 0})
         stat["total"] += 1
-        if bool(tool.get("available")):
+        if available:
             stat["available"] += 1
 
     out: list[dict[str, Any]] = []
@@ -1279,14 +1846,474 @@ async def _classes_with_policy(
             }
         )
 
-    out.sort(key=lambda x: str(x.get("key") or ""))
-    return out[: max(1, min(int(limit or 200), 1000))]
+    # Keys come straight from the class map, so they are always non-empty strings.
+    if len(out) > 1:
+        out.sort(key=itemgetter("key"))
+    return out[: _clamp_limit(limit, 200, 1000)]
+
+
+_BUILTIN_TOOL_SPECS: tuple[dict[str, Any], ...] = (
+    {
+        "name": "get_project_metadata",
+        "description": "Looks up project metadata in Mongo.",
+        "model": GetProjectMetadataRequest,
+        "handler": _meta_handler,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 30,
+    },
+    {
+        "name": "repo_tree",
+        "description": "Lists repository files/folders with depth/path filters.",
+        "model": RepoTreeRequest,
+        "handler": repo_tree,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 60,
+        "max_retries": 1,
+        "cache_ttl_sec": 20,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "repo_grep",
+        "description": "Searches text patterns in repository files.",
+        "model": RepoGrepRequest,
+        "handler": repo_grep,
+        "timeout_sec": 40,
+        "rate_limit_per_min": 80,
+        "max_retries": 1,
+        "cache_ttl_sec": 12,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "keyword_search",
+        "description": "Text keyword search over ingested project chunks.",
+        "model": KeywordSearchRequest,
+        "handler": keyword_search,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 100,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "symbol_search",
+        "description": "Finds likely code symbols (functions/classes/interfaces/etc.).",
+        "model": SymbolSearchRequest,
+        "handler": symbol_search,
+        "timeout_sec": 40,
+        "rate_limit_per_min": 80,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "open_file",
+        "description": "Reads file contents (optionally at specific ref/line range).",
+        "model": OpenFileRequest,
+        "handler": open_file,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 20,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "read_chat_messages",
+        "description": "Reads recent messages from the current chat (for conversational context).",
+        "model": ReadChatMessagesRequest,
+        "handler": read_chat_messages,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 5,
+    },
+    {
+        "name": "workspace_get_context",
+        "description": "Returns active workspace context (open tabs, dirty drafts, recent patch runs).",
+        "model": WorkspaceGetContextRequest,
+        "handler": workspace_get_context,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 5,
+    },
+    {
+        "name": "request_user_input",
+        "description": "Creates a follow-up question that requires direct user input (open text or option selection).",
+        "model": RequestUserInputRequest,
+        "handler": request_user_input,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 80,
+        "max_retries": 1,
+        "cache_ttl_sec": 0,
+        "read_only": True,
+    },
+    {
+        "name": "git_list_branches",
+        "description": "Lists branches from local repo or configured remote git connector.",
+        "model": GitListBranchesRequest,
+        "handler": git_list_branches,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 90,
+        "max_retries": 1,
+        "cache_ttl_sec": 8,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_checkout_branch",
+        "description": "Checks out/switches branch (local) or switches active connector branch (remote).",
+        "model": GitCheckoutBranchRequest,
+        "handler": git_checkout_branch,
+        "timeout_sec": 45,
+        "rate_limit_per_min": 40,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_create_branch",
+        "description": "Creates a new branch from a source ref (local or remote connector).",
+        "model": GitCreateBranchRequest,
+        "handler": git_create_branch,
+        "timeout_sec": 55,
+        "rate_limit_per_min": 30,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_stage_files",
+        "description": "Stages selected files (or all) in local repository.",
+        "model": GitStageFilesRequest,
+        "handler": git_stage_files,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 60,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_unstage_files",
+        "description": "Unstages selected files (or all) in local repository.",
+        "model": GitUnstageFilesRequest,
+        "handler": git_unstage_files,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 60,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_commit",
+        "description": "Creates a git commit in local repository.",
+        "model": GitCommitRequest,
+        "handler": git_commit,
+        "timeout_sec": 50,
+        "rate_limit_per_min": 25,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_fetch",
+        "description": "Fetches refs from remote in local repository.",
+        "model": GitFetchRequest,
+        "handler": git_fetch,
+        "timeout_sec": 70,
+        "rate_limit_per_min": 25,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_pull",
+        "description": "Pulls updates from remote branch in local repository.",
+        "model": GitPullRequest,
+        "handler": git_pull,
+        "timeout_sec": 90,
+        "rate_limit_per_min": 20,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_push",
+        "description": "Pushes local branch to remote repository.",
+        "model": GitPushRequest,
+        "handler": git_push,
+        "timeout_sec": 90,
+        "rate_limit_per_min": 15,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_status",
+        "description": "Shows git working tree status for the project repository.",
+        "model": GitStatusRequest,
+        "handler": git_status,
+        "timeout_sec": 25,
+        "rate_limit_per_min": 90,
+        "max_retries": 1,
+        "cache_ttl_sec": 5,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_diff",
+        "description": "Returns git diff for working tree or between refs.",
+        "model": GitDiffRequest,
+        "handler": git_diff,
+        "timeout_sec": 30,
+        "rate_limit_per_min": 90,
+        "max_retries": 1,
+        "cache_ttl_sec": 5,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_log",
+        "description": "Returns recent commit history.",
+        "model": GitLogRequest,
+        "handler": git_log,
+        "timeout_sec": 25,
+        "rate_limit_per_min": 90,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "git_show_file_at_ref",
+        "description": "Reads a file at a specific git ref.",
+        "model": GitShowFileAtRefRequest,
+        "handler": _show_file_handler,
+        "timeout_sec": 35,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 20,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "compare_branches",
+        "description": "Compares two branches and returns changed files summary.",
+        "model": CompareBranchesRequest,
+        "handler": compare_branches,
+        "timeout_sec": 45,
+        "rate_limit_per_min": 60,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "read_docs_folder",
+        "description": "Reads markdown files from documentation folder for a branch.",
+        "model": ReadDocsFolderRequest,
+        "handler": read_docs_folder,
+        "timeout_sec": 40,
+        "rate_limit_per_min": 80,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+        "cache_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "generate_project_docs",
+        "description": "Generates or refreshes repository documentation files.",
+        "model": GenerateProjectDocsRequest,
+        "handler": _docs_handler,
+        "timeout_sec": 900,
+        "rate_limit_per_min": 8,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "run_tests",
+        "description": "Runs repository tests with a configured/safe command.",
+        "model": RunTestsRequest,
+        "handler": run_tests,
+        "timeout_sec": 900,
+        "rate_limit_per_min": 15,
+        "read_only": False,
+    },
+    {
+        "name": "write_documentation_file",
+        "description": "Writes/updates a markdown file under documentation/ in the local repository.",
+        "model": WriteDocumentationFileRequest,
+        "handler": write_documentation_file,
+        "timeout_sec": 45,
+        "rate_limit_per_min": 30,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_REPO_STATE,),
+    },
+    {
+        "name": "create_jira_issue",
+        "description": "Creates a Jira issue using configured Jira connector.",
+        "model": CreateJiraIssueRequest,
+        "handler": create_jira_issue,
+        "timeout_sec": 45,
+        "rate_limit_per_min": 20,
+        "read_only": False,
+    },
+    {
+        "name": "create_chat_task",
+        "description": "Creates an actionable task item linked to the current chat.",
+        "model": CreateChatTaskRequest,
+        "handler": create_chat_task,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 40,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_CHAT_TASKS,),
+    },
+    {
+        "name": "list_chat_tasks",
+        "description": "Lists task items for the current project/chat.",
+        "model": ListChatTasksRequest,
+        "handler": list_chat_tasks,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 80,
+        "max_retries": 1,
+        "cache_ttl_sec": 5,
+        "cache_tags": (_CACHE_TAG_CHAT_TASKS,),
+    },
+    {
+        "name": "update_chat_task",
+        "description": "Updates an existing chat task (status/title/details/assignee/due date).",
+        "model": UpdateChatTaskRequest,
+        "handler": update_chat_task,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 40,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_CHAT_TASKS,),
+    },
+    {
+        "name": "create_automation",
+        "description": "Creates a project automation with trigger, optional conditions, and action.",
+        "model": CreateAutomationRequest,
+        "handler": create_automation,
+        "timeout_sec": 25,
+        "rate_limit_per_min": 30,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_AUTOMATIONS,),
+    },
+    {
+        "name": "list_automations",
+        "description": "Lists configured automations for the current project.",
+        "model": ListAutomationsRequest,
+        "handler": list_automations,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 90,
+        "max_retries": 1,
+        "cache_ttl_sec": 5,
+        "cache_tags": (_CACHE_TAG_AUTOMATIONS,),
+    },
+    {
+        "name": "update_automation",
+        "description": "Updates an existing automation (name/enabled/trigger/conditions/action/cooldown/tags).",
+        "model": UpdateAutomationRequest,
+        "handler": update_automation,
+        "timeout_sec": 25,
+        "rate_limit_per_min": 30,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_AUTOMATIONS,),
+    },
+    {
+        "name": "delete_automation",
+        "description": "Deletes an automation and its run history.",
+        "model": DeleteAutomationRequest,
+        "handler": delete_automation,
+        "timeout_sec": 20,
+        "rate_limit_per_min": 30,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_AUTOMATIONS,),
+    },
+    {
+        "name": "run_automation",
+        "description": "Runs an automation immediately in manual mode.",
+        "model": RunAutomationRequest,
+        "handler": run_automation,
+        "timeout_sec": 1200,
+        "rate_limit_per_min": 20,
+        "read_only": False,
+        "invalidates_tags": (_CACHE_TAG_AUTOMATIONS,),
+    },
+    {
+        "name": "list_automation_templates",
+        "description": "Lists built-in automation templates that can be applied quickly.",
+        "model": ListAutomationTemplatesRequest,
+        "handler": list_automation_templates,
+        "timeout_sec": 15,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 30,
+    },
+    {
+        "name": "chroma_count",
+        "description": "Returns chunk count in Chroma collection.",
+        "model": ChromaCountRequest,
+        "handler": chroma_count,
+        "timeout_sec": 25,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+    },
+    {
+        "name": "chroma_search_chunks",
+        "description": "Semantic search over indexed chunks.",
+        "model": ChromaSearchChunksRequest,
+        "handler": chroma_search_chunks,
+        "timeout_sec": 30,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+    },
+    {
+        "name": "chroma_open_chunks",
+        "description": "Opens chunk IDs from Chroma.",
+        "model": ChromaOpenChunksRequest,
+        "handler": chroma_open_chunks,
+        "timeout_sec": 30,
+        "rate_limit_per_min": 120,
+        "max_retries": 1,
+        "cache_ttl_sec": 10,
+    },
+)
+
+
+# Override fields and their clamps: (field, min, max) for ints, then plain booleans.
+_OVERRIDE_INT_FIELDS: tuple[tuple[str, int, int], ...] = (
+    ("timeout_sec", 1, 3600),
+    ("rate_limit_per_min", 1, _RATE_LIMIT_MAX_PER_MIN),
+    ("max_retries", 0, 5),
+    ("cache_ttl_sec", 0, 3600),
+)
+_OVERRIDE_BOOL_FIELDS: tuple[str, ...] = ("read_only", "require_approval")
+
+
+def _apply_spec_overrides(entry: dict[str, Any], ov: Mapping[str, Any]) -> dict[str, Any]:
+    out = dict(entry)
+    description = ov.get("description")
+    if description:
+        out["description"] = str(description)
+    for key, lo, hi in _OVERRIDE_INT_FIELDS:
+        raw = ov.get(key)
+        if raw is not None:
+            out[key] = max(lo, min(int(raw), hi))
+    for key in _OVERRIDE_BOOL_FIELDS:
+        raw = ov.get(key)
+        if raw is not None:
+            out[key] = bool(raw)
+    return out
+
+
+_BUILTIN_TOOL_NAMES = frozenset(entry["name"] for entry in _BUILTIN_TOOL_SPECS)
+# Name -> spec shared by every default runtime that does not override it. Registered specs are not
+# mutated after preparation (re-preparing recomputes the same derived values), so sharing is safe.
+_BUILTIN_SPEC_POOL: dict[str, ToolSpec] = {}
+
+
+def _new_builtin_spec(rt: ToolRuntime, entry: dict[str, Any]) -> ToolSpec:
+    spec = ToolSpec(**entry)
+    # Builtins carry their effective class explicitly, so catalog rows never fall back per call.
+    spec.class_key = rt._effective_spec_class_key(spec.name, spec)
+    if not spec.class_display:
+        spec.class_display = rt._default_class_display(spec.class_key)
+    return spec
 
 
 def build_default_tool_runtime(
     *,
     enabled_names: set[str] | None = None,
-    spec_overrides: dict[str, dict[str, Any]] | None = None,
+    spec_overrides: Mapping[str, Mapping[str, Any]] | None = None,
 ) -> ToolRuntime:
     rt = ToolRuntime()
 
@@ -1298,7 +2325,7 @@ def build_default_tool_runtime(
             include_parameters=bool(req.include_parameters),
             class_key=normalize_class_key(req.class_key),
             include_subclasses=bool(req.include_subclasses),
-            limit=max(1, min(int(req.limit or 200), 500)),
+            limit=_clamp_limit(req.limit, 200, 500),
         )
         return ListToolsResponse(count=len(rows), tools=rows)
 
@@ -1311,20 +2338,24 @@ def build_default_tool_runtime(
             class_key=normalize_class_key(req.class_key),
             include_subclasses=bool(req.include_subclasses),
             query=str(req.query or ""),
-            limit=max(1, min(int(req.limit or 20), 200)),
+            limit=_clamp_limit(req.limit, 20, 200),
         )
         return SearchToolsResponse(query=str(req.query or ""), count=len(rows), tools=rows)
 
     async def _get_tool_details_handler(req: GetToolDetailsRequest, ctx: ToolContext) -> GetToolDetailsResponse:
+        needle = str(req.tool_name or "").strip().lower()
+        spec = rt._tool_by_lower_name(needle)
+        if not spec:
+            return GetToolDetailsResponse(found=False, tool=None)
         rows = await _catalog_with_policy(
             rt,
             ctx,
             include_unavailable=bool(req.include_unavailable),
             include_parameters=True,
-            limit=1000,
+            limit=1,
+            single_name=spec.name,
         )
-        needle = str(req.tool_name or "").strip().lower()
-        item = next((row for row in rows if str(row.get("name") or "").strip().lower() == needle), None)
+        item = rows[0] if rows else None
         return GetToolDetailsResponse(found=bool(item), tool=item)
 
     async def _list_tool_classes_handler(req: ListToolClassesRequest, ctx: ToolContext) -> ListToolClassesResponse:
@@ -1333,7 +2364,7 @@ def build_default_tool_runtime(
             ctx,
             include_unavailable=bool(req.include_unavailable),
             include_empty=bool(req.include_empty),
-            limit=max(1, min(int(req.limit or 200), 500)),
+            limit=_clamp_limit(req.limit, 200, 500),
         )
         return ListToolClassesResponse(count=len(rows), classes=rows)
 
@@ -1346,7 +2377,7 @@ def build_default_tool_runtime(
             include_parameters=bool(req.include_parameters),
             class_key=class_key,
             include_subclasses=bool(req.include_subclasses),
-            limit=max(1, min(int(req.limit or 200), 500)),
+            limit=_clamp_limit(req.limit, 200, 500),
         )
         return ListToolsByClassResponse(
             class_key=class_key,
@@ -1386,573 +2417,94 @@ def build_default_tool_runtime(
             sample_tools=sample,
         )
 
-    rt.register(
-        ToolSpec(
-            name="get_project_metadata",
-            description="Looks up project metadata in Mongo.",
-            model=GetProjectMetadataRequest,
-            handler=_meta_handler,
-            timeout_sec=20,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=30,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="list_tools",
-            description="Lists available tools for the current chat context.",
-            model=ListToolsRequest,
-            handler=_list_tools_handler,
-            timeout_sec=10,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="search_tools",
-            description="Searches available tools by name/description/parameter names.",
-            model=SearchToolsRequest,
-            handler=_search_tools_handler,
-            timeout_sec=10,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="get_tool_details",
-            description="Returns full details for a specific tool, including accepted parameters.",
-            model=GetToolDetailsRequest,
-            handler=_get_tool_details_handler,
-            timeout_sec=10,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="list_tool_classes",
-            description="Lists available tool classes with availability counts for the current context.",
-            model=ListToolClassesRequest,
-            handler=_list_tool_classes_handler,
-            timeout_sec=10,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-            class_key="system.discovery",
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="list_tools_by_class",
-            description="Lists tools for a specific class (optionally including subclasses).",
-            model=ListToolsByClassRequest,
-            handler=_list_tools_by_class_handler,
-            timeout_sec=10,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-            class_key="system.discovery",
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="get_tool_class_details",
-            description="Returns details for one tool class and sample tools available in current context.",
-            model=GetToolClassDetailsRequest,
-            handler=_get_tool_class_details_handler,
-            timeout_sec=10,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-            class_key="system.discovery",
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="repo_tree",
-            description="Lists repository files/folders with depth/path filters.",
-            model=RepoTreeRequest,
-            handler=repo_tree,
-            timeout_sec=35,
-            rate_limit_per_min=60,
-            max_retries=1,
-            cache_ttl_sec=20,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="repo_grep",
-            description="Searches text patterns in repository files.",
-            model=RepoGrepRequest,
-            handler=repo_grep,
-            timeout_sec=40,
-            rate_limit_per_min=80,
-            max_retries=1,
-            cache_ttl_sec=12,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="keyword_search",
-            description="Text keyword search over ingested project chunks.",
-            model=KeywordSearchRequest,
-            handler=keyword_search,
-            timeout_sec=35,
-            rate_limit_per_min=100,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="symbol_search",
-            description="Finds likely code symbols (functions/classes/interfaces/etc.).",
-            model=SymbolSearchRequest,
-            handler=symbol_search,
-            timeout_sec=40,
-            rate_limit_per_min=80,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="open_file",
-            description="Reads file contents (optionally at specific ref/line range).",
-            model=OpenFileRequest,
-            handler=open_file,
-            timeout_sec=35,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=20,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="read_chat_messages",
-            description="Reads recent messages from the current chat (for conversational context).",
-            model=ReadChatMessagesRequest,
-            handler=read_chat_messages,
-            timeout_sec=20,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="workspace_get_context",
-            description="Returns active workspace context (open tabs, dirty drafts, recent patch runs).",
-            model=WorkspaceGetContextRequest,
-            handler=workspace_get_context,
-            timeout_sec=20,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="request_user_input",
-            description="Creates a follow-up question that requires direct user input (open text or option selection).",
-            model=RequestUserInputRequest,
-            handler=request_user_input,
-            timeout_sec=20,
-            rate_limit_per_min=80,
-            max_retries=1,
-            cache_ttl_sec=0,
-            read_only=True,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_list_branches",
-            description="Lists branches from local repo or configured remote git connector.",
-            model=GitListBranchesRequest,
-            handler=git_list_branches,
-            timeout_sec=35,
-            rate_limit_per_min=90,
-            max_retries=1,
-            cache_ttl_sec=8,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_checkout_branch",
-            description="Checks out/switches branch (local) or switches active connector branch (remote).",
-            model=GitCheckoutBranchRequest,
-            handler=git_checkout_branch,
-            timeout_sec=45,
-            rate_limit_per_min=40,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_create_branch",
-            description="Creates a new branch from a source ref (local or remote connector).",
-            model=GitCreateBranchRequest,
-            handler=git_create_branch,
-            timeout_sec=55,
-            rate_limit_per_min=30,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_stage_files",
-            description="Stages selected files (or all) in local repository.",
-            model=GitStageFilesRequest,
-            handler=git_stage_files,
-            timeout_sec=35,
-            rate_limit_per_min=60,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_unstage_files",
-            description="Unstages selected files (or all) in local repository.",
-            model=GitUnstageFilesRequest,
-            handler=git_unstage_files,
-            timeout_sec=35,
-            rate_limit_per_min=60,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_commit",
-            description="Creates a git commit in local repository.",
-            model=GitCommitRequest,
-            handler=git_commit,
-            timeout_sec=50,
-            rate_limit_per_min=25,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_fetch",
-            description="Fetches refs from remote in local repository.",
-            model=GitFetchRequest,
-            handler=git_fetch,
-            timeout_sec=70,
-            rate_limit_per_min=25,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_pull",
-            description="Pulls updates from remote branch in local repository.",
-            model=GitPullRequest,
-            handler=git_pull,
-            timeout_sec=90,
-            rate_limit_per_min=20,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_push",
-            description="Pushes local branch to remote repository.",
-            model=GitPushRequest,
-            handler=git_push,
-            timeout_sec=90,
-            rate_limit_per_min=15,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_status",
-            description="Shows git working tree status for the project repository.",
-            model=GitStatusRequest,
-            handler=git_status,
-            timeout_sec=25,
-            rate_limit_per_min=90,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_diff",
-            description="Returns git diff for working tree or between refs.",
-            model=GitDiffRequest,
-            handler=git_diff,
-            timeout_sec=30,
-            rate_limit_per_min=90,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_log",
-            description="Returns recent commit history.",
-            model=GitLogRequest,
-            handler=git_log,
-            timeout_sec=25,
-            rate_limit_per_min=90,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="git_show_file_at_ref",
-            description="Reads a file at a specific git ref.",
-            model=GitShowFileAtRefRequest,
-            handler=_show_file_handler,
-            timeout_sec=35,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=20,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="compare_branches",
-            description="Compares two branches and returns changed files summary.",
-            model=CompareBranchesRequest,
-            handler=compare_branches,
-            timeout_sec=45,
-            rate_limit_per_min=60,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="read_docs_folder",
-            description="Reads markdown files from documentation folder for a branch.",
-            model=ReadDocsFolderRequest,
-            handler=read_docs_folder,
-            timeout_sec=40,
-            rate_limit_per_min=80,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="generate_project_docs",
-            description="Generates or refreshes repository documentation files.",
-            model=GenerateProjectDocsRequest,
-            handler=_docs_handler,
-            timeout_sec=900,
-            rate_limit_per_min=8,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="run_tests",
-            description="Runs repository tests with a configured/safe command.",
-            model=RunTestsRequest,
-            handler=run_tests,
-            timeout_sec=900,
-            rate_limit_per_min=15,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="write_documentation_file",
-            description="Writes/updates a markdown file under documentation/ in the local repository.",
-            model=WriteDocumentationFileRequest,
-            handler=write_documentation_file,
-            timeout_sec=45,
-            rate_limit_per_min=30,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="create_jira_issue",
-            description="Creates a Jira issue using configured Jira connector.",
-            model=CreateJiraIssueRequest,
-            handler=create_jira_issue,
-            timeout_sec=45,
-            rate_limit_per_min=20,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="create_chat_task",
-            description="Creates an actionable task item linked to the current chat.",
-            model=CreateChatTaskRequest,
-            handler=create_chat_task,
-            timeout_sec=20,
-            rate_limit_per_min=40,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="list_chat_tasks",
-            description="Lists task items for the current project/chat.",
-            model=ListChatTasksRequest,
-            handler=list_chat_tasks,
-            timeout_sec=20,
-            rate_limit_per_min=80,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="update_chat_task",
-            description="Updates an existing chat task (status/title/details/assignee/due date).",
-            model=UpdateChatTaskRequest,
-            handler=update_chat_task,
-            timeout_sec=20,
-            rate_limit_per_min=40,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="create_automation",
-            description="Creates a project automation with trigger, optional conditions, and action.",
-            model=CreateAutomationRequest,
-            handler=create_automation,
-            timeout_sec=25,
-            rate_limit_per_min=30,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="list_automations",
-            description="Lists configured automations for the current project.",
-            model=ListAutomationsRequest,
-            handler=list_automations,
-            timeout_sec=20,
-            rate_limit_per_min=90,
-            max_retries=1,
-            cache_ttl_sec=5,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="update_automation",
-            description="Updates an existing automation (name/enabled/trigger/conditions/action/cooldown/tags).",
-            model=UpdateAutomationRequest,
-            handler=update_automation,
-            timeout_sec=25,
-            rate_limit_per_min=30,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="delete_automation",
-            description="Deletes an automation and its run history.",
-            model=DeleteAutomationRequest,
-            handler=delete_automation,
-            timeout_sec=20,
-            rate_limit_per_min=30,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="run_automation",
-            description="Runs an automation immediately in manual mode.",
-            model=RunAutomationRequest,
-            handler=run_automation,
-            timeout_sec=1200,
-            rate_limit_per_min=20,
-            read_only=False,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="list_automation_templates",
-            description="Lists built-in automation templates that can be applied quickly.",
-            model=ListAutomationTemplatesRequest,
-            handler=list_automation_templates,
-            timeout_sec=15,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=30,
-        )
-    )
-
-    rt.register(
-        ToolSpec(
-            name="chroma_count",
-            description="Returns chunk count in Chroma collection.",
-            model=ChromaCountRequest,
-            handler=chroma_count,
-            timeout_sec=25,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-    rt.register(
-        ToolSpec(
-            name="chroma_search_chunks",
-            description="Semantic search over indexed chunks.",
-            model=ChromaSearchChunksRequest,
-            handler=chroma_search_chunks,
-            timeout_sec=30,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
+    # Discovery handlers close over `rt`, so their specs are declared per runtime.
+    discovery_specs: tuple[dict[str, Any], ...] = (
+        {
+            "name": "list_tools",
+            "description": "Lists available tools for the current chat context.",
+            "model": ListToolsRequest,
+            "handler": _list_tools_handler,
+            "timeout_sec": 10,
+            "rate_limit_per_min": 120,
+            "max_retries": 1,
+            "cache_ttl_sec": 5,
+        },
+        {
+            "name": "search_tools",
+            "description": "Searches available tools by name/description/parameter names.",
+            "model": SearchToolsRequest,
+            "handler": _search_tools_handler,
+            "timeout_sec": 10,
+            "rate_limit_per_min": 120,
+            "max_retries": 1,
+            "cache_ttl_sec": 5,
+        },
+        {
+            "name": "get_tool_details",
+            "description": "Returns full details for a specific tool, including accepted parameters.",
+            "model": GetToolDetailsRequest,
+            "handler": _get_tool_details_handler,
+            "timeout_sec": 10,
+            "rate_limit_per_min": 120,
+            "max_retries": 1,
+            "cache_ttl_sec": 5,
+        },
+        {
+            "name": "list_tool_classes",
+            "description": "Lists available tool classes with availability counts for the current context.",
+            "model": ListToolClassesRequest,
+            "handler": _list_tool_classes_handler,
+            "timeout_sec": 10,
+            "rate_limit_per_min": 120,
+            "max_retries": 1,
+            "cache_ttl_sec": 5,
+            "class_key": "system.discovery",
+        },
+        {
+            "name": "list_tools_by_class",
+            "description": "Lists tools for a specific class (optionally including subclasses).",
+            "model": ListToolsByClassRequest,
+            "handler": _list_tools_by_class_handler,
+            "timeout_sec": 10,
+            "rate_limit_per_min": 120,
+            "max_retries": 1,
+            "cache_ttl_sec": 5,
+            "class_key": "system.discovery",
+        },
+        {
+            "name": "get_tool_class_details",
+            "description": "Returns details for one tool class and sample tools available in current context.",
+            "model": GetToolClassDetailsRequest,
+            "handler": _get_tool_class_details_handler,
+            "timeout_sec": 10,
+            "rate_limit_per_min": 120,
+            "max_retries": 1,
+            "cache_ttl_sec": 5,
+            "class_key": "system.discovery",
+        },
     )
-    rt.register(
-        ToolSpec(
-            name="chroma_open_chunks",
-            description="Opens chunk IDs from Chroma.",
-            model=ChromaOpenChunksRequest,
-            handler=chroma_open_chunks,
-            timeout_sec=30,
-            rate_limit_per_min=120,
-            max_retries=1,
-            cache_ttl_sec=10,
-        )
-    )
-
-    for _name, _spec in rt._tools.items():
-        _spec.class_key = rt._effective_spec_class_key(_name, _spec)
-        if not _spec.class_display:
-            _spec.class_display = rt._default_class_display(_spec.class_key)
-
+    allowed: frozenset[str] | None = None
     if enabled_names is not None:
-        allowed = set(str(x).strip() for x in enabled_names if str(x).strip())
-        rt._tools = {name: spec for name, spec in rt._tools.items() if name in allowed}
-
-    if isinstance(spec_overrides, dict) and spec_overrides:
-        for name, ov in spec_overrides.items():
-            spec = rt._tools.get(name)
-            if not spec or not isinstance(ov, dict):
-                continue
-            if "description" in ov and ov.get("description") is not None:
-                spec.description = str(ov.get("description") or spec.description)
-            if "timeout_sec" in ov and ov.get("timeout_sec") is not None:
-                spec.timeout_sec = max(1, min(int(ov.get("timeout_sec")), 3600))
-            if "rate_limit_per_min" in ov and ov.get("rate_limit_per_min") is not None:
-                spec.rate_limit_per_min = max(1, min(int(ov.get("rate_limit_per_min")), 6000))
-            if "max_retries" in ov and ov.get("max_retries") is not None:
-                spec.max_retries = max(0, min(int(ov.get("max_retries")), 5))
-            if "cache_ttl_sec" in ov and ov.get("cache_ttl_sec") is not None:
-                spec.cache_ttl_sec = max(0, min(int(ov.get("cache_ttl_sec")), 3600))
-            if "read_only" in ov and ov.get("read_only") is not None:
-                spec.read_only = bool(ov.get("read_only"))
-            if "require_approval" in ov and ov.get("require_approval") is not None:
-                spec.require_approval = bool(ov.get("require_approval"))
-
+        allowed = frozenset(filter(None, (str(x).strip() for x in enabled_names)))
+    # None when nothing is overridden, so the per-tool lookup below is skipped entirely.
+    overrides = spec_overrides if isinstance(spec_overrides, Mapping) and spec_overrides else None
+
+    specs: list[ToolSpec] = []
+    for entry in (*discovery_specs, *_BUILTIN_TOOL_SPECS):
+        name = entry["name"]
+        if allowed is not None and name not in allowed:
+            continue
+        ov = overrides.get(name) if overrides is not None else None
+        if isinstance(ov, Mapping) and ov:
+            specs.append(_new_builtin_spec(rt, _apply_spec_overrides(entry, ov)))
+            continue
+        # Unmodified static builtins are shared templates; discovery handlers close over `rt` and are never pooled.
+        spec = _BUILTIN_SPEC_POOL.get(name) if name in _BUILTIN_TOOL_NAMES else None
+        if spec is None:
+            spec = _new_builtin_spec(rt, entry)
+            if name in _BUILTIN_TOOL_NAMES:
+                _BUILTIN_SPEC_POOL[name] = spec
+        specs.append(spec)
+
+    rt.register_many(specs)
     return rt
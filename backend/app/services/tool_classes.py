@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Mapping, Sequence
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Any
@@ -207,7 +208,7 @@ def class_map(rows: list[dict[str, Any]]) -> dict[str, dict[str, Any]]:
     return {str(row.get("key") or ""): row for row in rows if str(row.get("key") or "").strip()}
 
 
-def class_descendants(rows: list[dict[str, Any]], class_key: str) -> set[str]:
+def class_descendants(rows: Sequence[Mapping[str, Any]], class_key: str) -> set[str]:
     needle = normalize_class_key(class_key)
     if not needle:
         return set()
@@ -232,18 +233,17 @@ def class_descendants(rows: list[dict[str, Any]], class_key: str) -> set[str]:
     return out
 
 
-def class_path_chain(rows: list[dict[str, Any]], key: str | None) -> list[str]:
+def class_path_chain(rows: Sequence[Mapping[str, Any]], key: str | None) -> list[str]:
     k = normalize_class_key(key)
     if not k:
         return []
-    by_key = class_map(rows)
+    parent_by_key = {str(row.get("key") or ""): str(row.get("parent_key") or "").strip() for row in rows}
     out: list[str] = []
     seen: set[str] = set()
     cur = k
     while cur and cur not in seen:
         seen.add(cur)
         out.append(cur)
-        parent = str((by_key.get(cur) or {}).get("parent_key") or "").strip()
-        cur = parent or ""
+        cur = parent_by_key.get(cur, "")
     out.reverse()
     return out
@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+
+from pydantic import BaseModel
+
+from app.rag import tool_runtime
+from app.rag.tool_runtime import (
+    ToolContext,
+    ToolRuntime,
+    ToolSpec,
+    _catalog_with_policy,
+    _classes_with_policy,
+    build_default_tool_runtime,
+)
+from app.services.tool_classes import builtin_tool_classes
+
+
+class _ReadReq(BaseModel):
+    path: str
+    limit: int = 10
+
+
+async def _handler(_payload: _ReadReq):
+    return {"ok": True}
+
+
+def _row(rt: ToolRuntime, name: str) -> dict:
+    return next(row for row in rt.catalog() if row["name"] == name)
+
+
+class ToolRuntimeCatalogTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.capability_calls = 0
+        self.rt = self._without_db(ToolRuntime())
+        self.rt.register(ToolSpec(name="read_tool", description="read", model=_ReadReq, handler=_handler))
+        self.ctx = ToolContext(project_id="p1", branch="main", user_id="u1", policy={})
+
+    def _without_db(self, rt: ToolRuntime) -> ToolRuntime:
+        async def _classes_without_db():
+            return builtin_tool_classes()
+
+        async def _allow_without_capability_db(_name: str, _spec: ToolSpec, _ctx: ToolContext):
+            self.capability_calls += 1
+            return True, ""
+
+        rt._load_tool_classes_cached = _classes_without_db  # type: ignore[method-assign]
+        rt._tool_capability_allowed = _allow_without_capability_db  # type: ignore[method-assign]
+        return rt
+
+    def _list(self, **kwargs):
+        return asyncio.run(
+            _catalog_with_policy(self.rt, self.ctx, include_unavailable=False, include_parameters=True, **kwargs)
+        )
+
+    def test_catalog_is_cached_until_register(self) -> None:
+        first = self.rt.catalog()
+        second = self.rt.catalog()
+        self.assertEqual(first, second)
+        self.assertIs(first[0], second[0])
+
+        self.rt.register(ToolSpec(name="another_tool", description="another", model=_ReadReq, handler=_handler))
+        third = self.rt.catalog()
+        self.assertEqual([row["name"] for row in third], ["another_tool", "read_tool"])
+
+    def test_register_many_refreshes_catalog_and_schema(self) -> None:
+        before = self.rt.schema_text()
+        self.rt.register_many(
+            ToolSpec(name=f"bulk_{i}", description="bulk", model=_ReadReq, handler=_handler) for i in range(3)
+        )
+        self.assertEqual([row["name"] for row in self.rt.catalog()], ["bulk_0", "bulk_1", "bulk_2", "read_tool"])
+        schema = self.rt.schema_text()
+        self.assertNotEqual(schema, before)
+        for name in ("bulk_0", "bulk_1", "bulk_2", "read_tool"):
+            self.assertIn(name, schema)
+
+    def test_default_runtime_reuses_model_and_handler_introspection(self) -> None:
+        first = build_default_tool_runtime()
+        second = build_default_tool_runtime()
+        self.assertIs(_row(first, "repo_grep")["parameters"], _row(second, "repo_grep")["parameters"])
+        # list_tools takes (payload, ctx); it only succeeds if the context is passed through.
+        listed = asyncio.run(self._without_db(second).execute("list_tools", {}, self.ctx))
+        self.assertTrue(listed.ok, listed.error)
+
+        class _Handlers:
+            async def bound(self, payload: _ReadReq):
+                return {"ok": True}
+
+        self.assertEqual(tool_runtime._handler_param_count(_Handlers().bound), 1)
+
+    def test_tool_table_is_read_only(self) -> None:
+        spec = self.rt._tools["read_tool"]
+        with self.assertRaises(TypeError):
+            self.rt._tools["other"] = spec  # type: ignore[index]
+        self.assertFalse(hasattr(spec, "__dict__"))
+
+    def test_catalog_list_mutation_does_not_leak_into_cache(self) -> None:
+        rows = self.rt.catalog()
+        rows.clear()
+        self.assertEqual(len(self.rt.catalog()), 1)
+
+    def test_catalog_with_policy_reuses_recent_result(self) -> None:
+        first = self._list()
+        calls_after_first = self.capability_calls
+        second = self._list()
+        self.assertEqual(first, second)
+        self.assertEqual(self.capability_calls, calls_after_first)
+
+        self.ctx.policy = {"blocked_tools": ["read_tool"]}
+        self.assertEqual(self._list(), [])
+
+    def test_discovery_index_is_rebuilt_only_when_tools_change(self) -> None:
+        rows = builtin_tool_classes()
+        first = self.rt._discovery_index(rows)
+        self.assertIs(self.rt._discovery_index(rows), first)
+
+        self.rt.register(ToolSpec(name="another_tool", description="another", model=_ReadReq, handler=_handler))
+        rebuilt = self.rt._discovery_index(rows)
+        self.assertIsNot(rebuilt, first)
+        self.assertEqual([row.entry.name for row in rebuilt.rows], ["another_tool", "read_tool"])
+        read_row = rebuilt.by_name["read_tool"]
+        self.assertEqual(read_row.class_display_lc, read_row.class_display.lower())
+        self.assertEqual([row.entry.name for row in rebuilt.by_class[read_row.class_key]], ["another_tool", "read_tool"])
+
+    def test_class_filter_reads_class_slices(self) -> None:
+        self.rt.register(ToolSpec(name="grep_tool", description="grep", model=_ReadReq, handler=_handler, class_key="repo"))
+        read_key = _row(self.rt, "read_tool")["class_key"]
+        self.assertEqual([row["name"] for row in self._list(class_key=read_key, include_subclasses=False)], ["read_tool"])
+        specs = asyncio.run(self.rt.tools_in_class("repo"))
+        self.assertEqual([spec.name for spec in specs], ["grep_tool"])
+
+    def test_search_matches_precomputed_haystack(self) -> None:
+        self.assertEqual([row["name"] for row in self._list(query="LIMIT")], ["read_tool"])
+        self.assertEqual([row["name"] for row in self._list(query="utilities")], ["read_tool"])
+        self.assertEqual(self._list(query="no-such-term"), [])
+
+    def test_class_tallies_come_from_counts_only_pass(self) -> None:
+        key = _row(self.rt, "read_tool")["class_key"]
+        tallies = asyncio.run(
+            _catalog_with_policy(self.rt, self.ctx, include_unavailable=True, include_parameters=False, counts_only=True)
+        )
+        self.assertEqual(tallies, [(key, True)])
+
+        self.ctx.policy = {"blocked_tools": ["read_tool"]}
+        classes = asyncio.run(_classes_with_policy(self.rt, self.ctx, include_unavailable=True, include_empty=False))
+        stats = {row["key"]: (row["total_tools"], row["available_tools"]) for row in classes}
+        self.assertEqual(stats, {key: (1, 0)})
+
+    def test_get_tool_details_looks_up_single_tool(self) -> None:
+        rt = self._without_db(build_default_tool_runtime())
+        out = asyncio.run(rt.execute("get_tool_details", {"tool_name": " LIST_TOOLS "}, self.ctx))
+        self.assertTrue(out.ok)
+        self.assertTrue(out.result["found"])
+        self.assertEqual(out.result["tool"]["name"], "list_tools")
+        self.assertTrue(out.result["tool"]["parameters"])
+
+        missing = asyncio.run(rt.execute("get_tool_details", {"tool_name": "no_such_tool"}, self.ctx))
+        self.assertFalse(missing.result["found"])
+
+    def test_policy_is_frozen_per_context_and_decisions_are_reused(self) -> None:
+        self.ctx.policy = {"blocked_tools": ["read_tool"]}
+        policy = self.rt._policy_dict(self.ctx)
+        self.assertIs(self.rt._policy_dict(self.ctx), policy)
+        with self.assertRaises(TypeError):
+            policy["read_only_only"] = True  # type: ignore[index]
+
+        spec = self.rt._tools["read_tool"]
+        self.assertEqual(self.rt._is_tool_allowed("read_tool", spec, policy), (False, "blocked_by_policy"))
+        self.assertIn("read_tool", self.rt._policy_decision_cache[id(policy)][2])
+        self.assertEqual(self.rt._policy_view(policy).blocked, frozenset({"read_tool"}))
+
+        self.ctx.policy = {}
+        fresh = self.rt._policy_dict(self.ctx)
+        self.assertIsNot(fresh, policy)
+        self.assertEqual(self.rt._is_tool_allowed("read_tool", spec, fresh), (True, ""))
+
+    def test_default_runtime_filters_and_overrides_before_construction(self) -> None:
+        rt = build_default_tool_runtime(
+            enabled_names={"repo_grep", " list_tools "},
+            spec_overrides={"repo_grep": {"timeout_sec": 99999, "description": "Custom grep."}, "repo_tree": {"timeout_sec": 5}},
+        )
+        self.assertEqual([row["name"] for row in rt.catalog()], ["list_tools", "repo_grep"])
+        grep_row = _row(rt, "repo_grep")
+        self.assertEqual(grep_row["timeout_sec"], 3600)
+        self.assertEqual(grep_row["description"], "Custom grep.")
+        self.assertIn("Custom grep.", rt.schema_text())
+
+        plain = build_default_tool_runtime()
+        self.assertNotEqual(_row(plain, "repo_grep")["timeout_sec"], 3600)
+        self.assertNotIn("Custom grep.", plain.schema_text())
+        # Unmodified builtin specs are shared across runtimes.
+        self.assertIs(plain._tools["repo_tree"], build_default_tool_runtime()._tools["repo_tree"])
+        self.assertIsNot(plain._tools["list_tools"], rt._tools["list_tools"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,350 @@
+from __future__ import annotations
+
+import asyncio
+import unittest
+from unittest import mock
+
+from pydantic import BaseModel
+
+from app.rag import tool_runtime
+from app.rag.tool_runtime import ToolContext, ToolRuntime, ToolSpec
+
+
+class _QueryReq(BaseModel):
+    query: str
+
+
+class _PairReq(BaseModel):
+    a: str
+    b: str
+
+
+class _ScopedReq(BaseModel):
+    project_id: str = ""
+    branch: str = ""
+    query: str
+
+
+class ToolRuntimeExecuteTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rt = ToolRuntime()
+        self.calls = 0
+
+        async def query_handler(payload: _QueryReq):
+            self.calls += 1
+            return {"query": payload.query, "hits": [1, 2]}
+
+        self.rt.register(
+            ToolSpec(
+                name="query_tool",
+                description="query",
+                model=_QueryReq,
+                handler=query_handler,
+                cache_ttl_sec=30,
+            )
+        )
+
+        async def _allow_without_capability_db(_name: str, _spec: ToolSpec, _ctx: ToolContext):
+            return True, ""
+
+        self.rt._tool_capability_allowed = _allow_without_capability_db  # type: ignore[method-assign]
+        self.ctx = ToolContext(project_id="p1", branch="main", user_id="u1", policy={})
+
+    def _run(self, coro):
+        return asyncio.run(coro)
+
+    def test_cache_hit_returns_copy_marked_as_cached(self) -> None:
+        first = self._run(self.rt.execute("query_tool", {"query": "x"}, self.ctx))
+        second = self._run(self.rt.execute("query_tool", {"query": "x"}, self.ctx))
+        self.assertEqual(self.calls, 1)
+        self.assertFalse(first.cached)
+        self.assertTrue(second.cached)
+        self.assertEqual(second.duration_ms, 0)
+        self.assertEqual(second.result, first.result)
+        self.assertEqual(second.input_bytes, first.input_bytes)
+
+    def test_result_cache_ttl_is_jittered_per_entry(self) -> None:
+        with mock.patch.object(tool_runtime.time, "monotonic", return_value=1000.0), mock.patch.object(
+            tool_runtime.random, "uniform", return_value=0.85
+        ) as uniform:
+            self._run(self.rt.execute("query_tool", {"query": "x"}, self.ctx))
+        uniform.assert_called_once_with(0.85, 1.15)
+        ((expires_at, _envelope, _stamp),) = self.rt._cache.values()
+        self.assertAlmostEqual(expires_at, 1000.0 + 30 * 0.85)
+
+    def test_writer_invalidates_tagged_cached_results(self) -> None:
+        async def write_handler(_payload: _QueryReq):
+            return {"written": True}
+
+        self.rt.register(
+            ToolSpec(name="status_tool", description="s", model=_QueryReq, handler=self.rt._tools["query_tool"].handler, cache_ttl_sec=30, cache_tags=("repo",))
+        )
+        self.rt.register(
+            ToolSpec(name="commit_tool", description="c", model=_QueryReq, handler=write_handler, read_only=False, invalidates_tags=("repo",))
+        )
+        self._run(self.rt.execute("status_tool", {"query": "x"}, self.ctx))
+        self._run(self.rt.execute("query_tool", {"query": "x"}, self.ctx))
+        self.assertTrue(self._run(self.rt.execute("status_tool", {"query": "x"}, self.ctx)).cached)
+
+        self._run(self.rt.execute("commit_tool", {"query": "x"}, self.ctx))
+        self.assertFalse(self._run(self.rt.execute("status_tool", {"query": "x"}, self.ctx)).cached)
+        self.assertTrue(self._run(self.rt.execute("status_tool", {"query": "x"}, self.ctx)).cached)
+        self.assertTrue(self._run(self.rt.execute("query_tool", {"query": "x"}, self.ctx)).cached)
+
+    def test_repository_readers_are_invalidated_by_repo_writes(self) -> None:
+        rt = tool_runtime.build_default_tool_runtime()
+        for name in ("repo_tree", "repo_grep", "keyword_search", "symbol_search"):
+            self.assertIn(tool_runtime._CACHE_TAG_REPO_STATE, rt._tools[name].cache_tags, name)
+        self.assertIn(tool_runtime._CACHE_TAG_REPO_STATE, rt._tools["write_documentation_file"].invalidates_tags)
+
+    def test_cache_key_ignores_argument_order(self) -> None:
+        calls: list[_PairReq] = []
+
+        async def pair_handler(payload: _PairReq):
+            calls.append(payload)
+            return {"a": payload.a, "b": payload.b}
+
+        self.rt.register(ToolSpec(name="pair_tool", description="pair", model=_PairReq, handler=pair_handler, cache_ttl_sec=30))
+        first = self._run(self.rt.execute("pair_tool", {"a": "1", "b": "2"}, self.ctx))
+        second = self._run(self.rt.execute("pair_tool", {"b": "2", "a": "1"}, self.ctx))
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(second.cached)
+        self.assertEqual(first.input_bytes, len('{"a": "1", "b": "2"}'))
+
+    def test_uncached_calls_skip_cache_key_but_report_input_size(self) -> None:
+        async def pair_handler(payload: _PairReq):
+            return {"a": payload.a}
+
+        self.rt.register(ToolSpec(name="write_pair", description="w", model=_PairReq, handler=pair_handler, read_only=False))
+        out = self._run(self.rt.execute("write_pair", {"b": "2", "a": "1"}, self.ctx))
+        self.assertEqual(out.input_bytes, len('{"a": "1", "b": "2"}'))
+        self.assertEqual(len(self.rt._cache), 0)
+
+    def test_context_defaults_only_touch_declared_context_fields(self) -> None:
+        self.rt.register(ToolSpec(name="scoped_tool", description="s", model=_ScopedReq, handler=self.rt._tools["query_tool"].handler))
+        scoped = self.rt._tools["scoped_tool"]
+        self.assertEqual(scoped.context_fields, frozenset({"project_id", "branch"}))
+        merged = self.rt._merge_context_defaults(scoped, {"query": "x", "project_id": "other", "branch": "dev"}, self.ctx)
+        self.assertEqual(merged, {"query": "x", "project_id": "p1", "branch": "dev"})
+
+        args = {"query": "x"}
+        plain = self.rt._merge_context_defaults(self.rt._tools["query_tool"], args, self.ctx)
+        self.assertEqual(plain, args)
+        self.assertIsNot(plain, args)
+
+    def test_trusted_args_skip_validation(self) -> None:
+        seen: list[_QueryReq] = []
+
+        async def trusted_handler(payload: _QueryReq):
+            seen.append(payload)
+            return {"ok": True}
+
+        self.rt.register(ToolSpec(name="trusted_tool", description="t", model=_QueryReq, handler=trusted_handler, trusted_args=True))
+        out = self._run(self.rt.execute("trusted_tool", {"query": 5}, self.ctx))
+        self.assertTrue(out.ok)
+        self.assertEqual(seen[0].query, 5)
+
+        rejected = self._run(self.rt.execute("query_tool", {"query": 5}, self.ctx))
+        self.assertEqual(rejected.error.code if rejected.error else None, "validation_error")
+        self.assertEqual(self.rt._tools["query_tool"].payload_builder, _QueryReq.model_validate)
+
+    def test_result_cache_evicts_least_recently_used(self) -> None:
+        with mock.patch.object(tool_runtime, "_RESULT_CACHE_MAX_ENTRIES", 2):
+            for query in ("a", "b"):
+                self._run(self.rt.execute("query_tool", {"query": query}, self.ctx))
+            self._run(self.rt.execute("query_tool", {"query": "a"}, self.ctx))
+            self._run(self.rt.execute("query_tool", {"query": "c"}, self.ctx))
+        self.assertEqual(len(self.rt._cache), 2)
+        self.assertEqual(self.calls, 3)
+
+        again = self._run(self.rt.execute("query_tool", {"query": "a"}, self.ctx))
+        self.assertTrue(again.cached)
+        evicted = self._run(self.rt.execute("query_tool", {"query": "b"}, self.ctx))
+        self.assertFalse(evicted.cached)
+
+    def test_rate_limit_window_expires_on_monotonic_clock(self) -> None:
+        self.ctx.policy = {"rate_limit_overrides": {"query_tool": 2}, "cache_ttl_overrides": {"query_tool": 0}}
+        with mock.patch.object(tool_runtime.time, "monotonic", return_value=1000.0):
+            for query in ("a", "b"):
+                self.assertTrue(self._run(self.rt.execute("query_tool", {"query": query}, self.ctx)).ok)
+            limited = self._run(self.rt.execute("query_tool", {"query": "c"}, self.ctx))
+        self.assertFalse(limited.ok)
+        self.assertEqual(limited.error.code if limited.error else None, "rate_limited")
+
+        with mock.patch.object(tool_runtime.time, "monotonic", return_value=1061.0):
+            self.assertTrue(self._run(self.rt.execute("query_tool", {"query": "c"}, self.ctx)).ok)
+        self.assertEqual(len(self.rt._windows["query_tool"]), 1)
+        self.assertEqual(self.rt._windows["query_tool"].maxlen, 64)
+
+    def test_transient_failures_back_off_before_each_retry(self) -> None:
+        failures = [ConnectionError("connection reset"), ConnectionError("connection reset")]
+
+        async def flaky_handler(_payload: _QueryReq):
+            if failures:
+                raise failures.pop(0)
+            return {"ok": True}
+
+        self.rt.register(ToolSpec(name="flaky_tool", description="f", model=_QueryReq, handler=flaky_handler, max_retries=2))
+        sleeps: list[float] = []
+
+        async def _record_sleep(delay: float) -> None:
+            sleeps.append(delay)
+
+        with mock.patch.object(tool_runtime.asyncio, "sleep", _record_sleep):
+            out = self._run(self.rt.execute("flaky_tool", {"query": "x"}, self.ctx))
+        self.assertTrue(out.ok)
+        self.assertEqual(out.attempts, 3)
+        self.assertEqual(sleeps, [0.2, 0.4])
+
+    def test_retries_share_a_class_budget(self) -> None:
+        async def flaky_handler(_payload: _QueryReq):
+            raise ConnectionError("connection reset")
+
+        self.rt.register_many(
+            [
+                ToolSpec(name="flaky_tool", description="f", model=_QueryReq, handler=flaky_handler, class_key="flaky", max_retries=1, rate_limit_per_min=1),
+                # Never retries, so its high rate limit must not widen the class budget.
+                ToolSpec(name="steady_tool", description="s", model=_QueryReq, handler=flaky_handler, class_key="flaky", rate_limit_per_min=100),
+            ]
+        )
+        # Raising the rate limit lets more calls through, but not more retries than the class budget (1/min).
+        self.ctx.policy = {"rate_limit_overrides": {"flaky_tool": 10}}
+
+        async def _no_sleep(_delay: float) -> None:
+            return None
+
+        with mock.patch.object(tool_runtime.asyncio, "sleep", _no_sleep):
+            outs = [self._run(self.rt.execute("flaky_tool", {"query": str(i)}, self.ctx)) for i in range(3)]
+        self.assertEqual([out.error.code if out.error else None for out in outs], ["execution_error"] * 3)
+        self.assertEqual([out.attempts for out in outs], [2, 1, 1])
+
+        # A policy retry override still gets the tool's own per-minute share.
+        self.ctx.policy = {"rate_limit_overrides": {"flaky_tool": 10}, "retry_overrides": {"steady_tool": 2}}
+        with mock.patch.object(tool_runtime.asyncio, "sleep", _no_sleep):
+            steady = self._run(self.rt.execute("steady_tool", {"query": "x"}, self.ctx))
+        self.assertEqual(steady.attempts, 3)
+
+    def test_retry_loop_stops_at_terminal_failures(self) -> None:
+        async def slow_handler(_payload: _QueryReq):
+            await asyncio.Event().wait()
+
+        async def _no_sleep(_delay: float) -> None:
+            return None
+
+        self.rt.register(ToolSpec(name="slow_tool", description="s", model=_QueryReq, handler=slow_handler, max_retries=1))
+        real_timeout = asyncio.timeout
+        with mock.patch.object(tool_runtime.asyncio, "timeout", lambda _delay: real_timeout(0.01)), mock.patch.object(
+            tool_runtime.asyncio, "sleep", _no_sleep
+        ):
+            timed_out = self._run(self.rt.execute("slow_tool", {"query": "x"}, self.ctx))
+        self.assertEqual(timed_out.error.code if timed_out.error else None, "timeout")
+        self.assertEqual(timed_out.attempts, 2)
+
+        async def broken_handler(_payload: _QueryReq):
+            raise ValueError("bad input")
+
+        self.rt.register(ToolSpec(name="broken_tool", description="b", model=_QueryReq, handler=broken_handler, max_retries=3))
+        failed = self._run(self.rt.execute("broken_tool", {"query": "x"}, self.ctx))
+        self.assertEqual(failed.error.code if failed.error else None, "execution_error")
+        self.assertEqual(failed.attempts, 1)
+
+    def test_connection_errors_are_transient_without_message_markers(self) -> None:
+        self.assertTrue(self.rt._transient_execution_error(BrokenPipeError()))
+        self.assertTrue(self.rt._transient_execution_error(RuntimeError("upstream returned 503")))
+        self.assertTrue(self.rt._transient_execution_error(RuntimeError("Service Temporarily Unavailable")))
+        self.assertFalse(self.rt._transient_execution_error(FileNotFoundError("missing.txt")))
+        self.assertFalse(self.rt._transient_execution_error(ValueError("")))
+
+    def test_model_results_are_dumped_with_resolved_dumper(self) -> None:
+        async def model_handler(payload: _QueryReq):
+            return _PairReq(a=payload.query, b="z")
+
+        self.rt.register(ToolSpec(name="model_tool", description="m", model=_QueryReq, handler=model_handler))
+        out = self._run(self.rt.execute("model_tool", {"query": "x"}, self.ctx))
+        self.assertEqual(out.result, {"a": "x", "b": "z"})
+        self.assertIs(self.rt._tools["model_tool"].result_dumper[0], _PairReq)
+
+        plain = self._run(self.rt.execute("query_tool", {"query": "x"}, self.ctx))
+        self.assertEqual(plain.result, {"query": "x", "hits": [1, 2]})
+        self.assertEqual(self.rt._tools["query_tool"].result_dumper, (dict, None))
+
+
+class _CountingAccessRepo:
+    def __init__(self) -> None:
+        self.project_lookups = 0
+        self.connectors = [{"type": "jira", "config": {"baseUrl": "https://jira", "email": "a@b", "apiToken": "t"}}]
+
+    async def find_project_doc(self, project_id: str):
+        self.project_lookups += 1
+        await asyncio.sleep(0.01)
+        return {"_id": project_id, "repo_path": ""}
+
+    async def list_enabled_connectors(self, *, project_id: str, limit: int):
+        return self.connectors
+
+
+class ToolRuntimeCapabilityTests(unittest.TestCase):
+    def test_concurrent_capability_misses_share_one_lookup(self) -> None:
+        rt = ToolRuntime()
+        repo = _CountingAccessRepo()
+        factory = mock.Mock(return_value=mock.Mock(access_policy=repo))
+        ctx = ToolContext(project_id="p1", branch="main", user_id="u1", policy={})
+
+        async def _burst():
+            return await asyncio.gather(*(rt._context_capabilities(ctx) for _ in range(5)))
+
+        with mock.patch.object(tool_runtime, "repository_factory", factory):
+            results = asyncio.run(_burst())
+        self.assertEqual(repo.project_lookups, 1)
+        self.assertTrue(all(r["jira_configured"] for r in results))
+        self.assertEqual(rt._capability_inflight, {})
+
+        with self.assertRaises(TypeError):
+            results[0]["jira_configured"] = False  # type: ignore[index]
+
+    def test_capability_decisions_are_shared_across_contexts(self) -> None:
+        rt = tool_runtime.build_default_tool_runtime()
+        repo = _CountingAccessRepo()
+        factory = mock.Mock(return_value=mock.Mock(access_policy=repo))
+
+        async def _check_twice():
+            out = []
+            for _ in range(2):
+                ctx = ToolContext(project_id="p1", branch="main", user_id="u1", policy={})
+                out.append(await rt._tool_capability_allowed("create_jira_issue", rt._tools["create_jira_issue"], ctx))
+            return out
+
+        with mock.patch.object(tool_runtime, "repository_factory", factory):
+            first, second = asyncio.run(_check_twice())
+        self.assertEqual(first, (True, ""))
+        self.assertIs(first, second)
+        self.assertEqual(repo.project_lookups, 1)
+
+    def test_capability_decisions_refresh_for_long_lived_context(self) -> None:
+        rt = tool_runtime.build_default_tool_runtime()
+        repo = _CountingAccessRepo()
+        factory = mock.Mock(return_value=mock.Mock(access_policy=repo))
+        ctx = ToolContext(project_id="p1", branch="main", user_id="u1", policy={})
+        # Shift the real clock rather than freezing it: the event loop reads the same time.monotonic.
+        real_monotonic = tool_runtime.time.monotonic
+        skew = [0.0]
+
+        with mock.patch.object(tool_runtime, "repository_factory", factory), mock.patch.object(
+            tool_runtime.time, "monotonic", side_effect=lambda: real_monotonic() + skew[0]
+        ):
+            first = asyncio.run(rt.execute("create_jira_issue", {}, ctx))
+            repo.connectors = []
+            skew[0] = 1.0
+            within_ttl = asyncio.run(rt.execute("create_jira_issue", {}, ctx))
+            skew[0] = 9.0
+            after_ttl = asyncio.run(rt.execute("create_jira_issue", {}, ctx))
+        # Arguments are missing, so an allowed call stops at validation.
+        self.assertEqual(first.error.code if first.error else None, "validation_error")
+        self.assertEqual(within_ttl.error.code if within_ttl.error else None, "validation_error")
+        # The same context sees the removed connector once the shared snapshot expires.
+        self.assertEqual(after_ttl.error.code if after_ttl.error else None, "forbidden")
+        self.assertEqual(repo.project_lookups, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()